@@ -3,37 +3,323 @@
 Verify Export Bundle - Evidence integrity verification script.
 
 Usage:
-    python verify_export_bundle.py <bundle_path> [--report]
+    python verify_export_bundle.py <bundle_path> [--report] [--workers N] [--cache]
     
 This script verifies SHA-256 hashes of all evidence files in an export bundle.
+Install ijson to stream very large manifests instead of loading them whole.
 """
 
 import argparse
 import hashlib
+import hmac
 import json
+import mmap
+import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Iterable, Iterator, Optional, Tuple
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-def compute_hash(file_path: Path) -> str:
-    """Compute SHA-256 hash of a file."""
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+
+# Read buffer for interpreters without hashlib.file_digest (Python < 3.11)
+HASH_BUFFER_SIZE = 4 * 1024 * 1024
+
+# Files larger than this are hashed from a memory map
+MMAP_THRESHOLD = 1024 * 1024
+
+# Hashing tasks kept in flight per worker when streaming the manifest
+TASKS_PER_WORKER = 4
+
+# Top-level manifest fields shown in the output and report
+MANIFEST_HEADER_FIELDS = ("version", "generated_at", "attempt_id")
+
+# Per-bundle (size, mtime_ns) -> hash caches, kept outside the evidence
+# bundles so verification never writes into one
+CACHE_DIR = Path.home() / ".cache" / "verify_export_bundle"
+
+
+def _hash_mapped(f, size: int) -> bytes:
+    """Hash an open file via mmap, avoiding the user-space read copy."""
+    with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        return hashlib.sha256(mm).digest()
+
+
+def hash_open_file(f, size: int) -> bytes:
+    """Compute the raw SHA-256 digest of an open binary file of known size."""
+    if size > MMAP_THRESHOLD:
+        try:
+            return _hash_mapped(f, size)
+        except (OSError, ValueError):
+            pass  # Fall back to streaming (e.g. special files)
+    
+    if hasattr(hashlib, "file_digest"):
+        # Reads straight into the hasher and releases the GIL
+        return hashlib.file_digest(f, "sha256").digest()
+    
     sha256 = hashlib.sha256()
+    buf = bytearray(HASH_BUFFER_SIZE)
+    view = memoryview(buf)
+    update = sha256.update
+    readinto = f.readinto
     
+    while n := readinto(buf):
+        update(view[:n])
+    
+    return sha256.digest()
+
+
+def compute_hash(file_path: Path) -> str:
+    """Compute SHA-256 hash of a file."""
     with open(file_path, 'rb') as f:
-        while chunk := f.read(8192):
-            sha256.update(chunk)
+        return hash_open_file(f, os.fstat(f.fileno()).st_size).hex()
+
+
+def _parse_digest(hex_hash) -> Optional[bytes]:
+    """Decode a hex SHA-256 string, or None if it is malformed."""
+    try:
+        return bytes.fromhex(hex_hash)
+    except (TypeError, ValueError):
+        return None
+
+
+def load_json(path: Path):
+    """Parse a JSON file, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(path.read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_json(path: Path, data, indent: bool = False):
+    """Serialize to JSON in memory and write it with a single call."""
+    if ORJSON_AVAILABLE:
+        payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    else:
+        payload = json.dumps(data, indent=2 if indent else None).encode("utf-8")
+    path.write_bytes(payload)
+
+
+def cache_path_for(bundle_path: Path) -> Path:
+    """Location of a bundle's verification cache, keyed by its resolved path."""
+    key = hashlib.sha256(str(bundle_path.resolve()).encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{key}.json"
+
+
+def load_hash_cache(bundle_path: Path) -> dict:
+    """
+    Load the verification cache for a bundle.
+    
+    The cache is discarded if the manifest was modified after it was written.
+    """
+    cache_path = cache_path_for(bundle_path)
+    manifest_path = bundle_path / "manifest.json"
+    
+    try:
+        if cache_path.stat().st_mtime_ns < manifest_path.stat().st_mtime_ns:
+            return {}
+        cache = load_json(cache_path)
+    except (OSError, ValueError):
+        return {}
     
-    return sha256.hexdigest()
+    return cache if isinstance(cache, dict) else {}
 
 
-def verify_bundle(bundle_path: Path, generate_report: bool = False) -> bool:
+def save_hash_cache(bundle_path: Path, cache: dict):
+    """Write the verification cache, warning if it cannot be stored."""
+    cache_path = cache_path_for(bundle_path)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(cache_path, cache)
+    except OSError as e:
+        print(f"WARNING: Could not write verification cache: {e}")
+
+
+def verify_file(
+    file_info: dict,
+    file_path: Path,
+    cached: Optional[dict] = None
+) -> Tuple[dict, Optional[dict]]:
+    """
+    Verify a single evidence file against its manifest entry.
+    
+    Runs in a worker process, so it only returns the result record;
+    printing is left to the caller.
+    
+    Args:
+        file_info: Manifest entry for the file
+        file_path: Location of the file in the bundle
+        cached: Previous cache entry for this file, if any
+        
+    Returns:
+        Tuple of (result record, cache entry if the file verified or is
+        unchanged since it last did)
+    """
+    filename = file_info["filename"]
+    expected_hash = file_info["hash_sha256"]
+    expected_size = file_info.get("size_bytes")
+    expected_digest = _parse_digest(expected_hash)
+    
+    # One open serves the size check, the cache check and the hash
+    try:
+        f = open(file_path, 'rb')
+    except FileNotFoundError:
+        return {
+            "file": filename,
+            "status": "NOT_FOUND",
+            "error": "File does not exist"
+        }, None
+    
+    with f:
+        st = os.fstat(f.fileno())
+        
+        # Check size
+        actual_size = st.st_size
+        if expected_size and actual_size != expected_size:
+            return {
+                "file": filename,
+                "status": "SIZE_MISMATCH",
+                "expected_size": expected_size,
+                "actual_size": actual_size
+            }, None
+        
+        # Skip hashing if this exact file already verified against this
+        # hash; reported as UNCHANGED since nothing was hashed in this run
+        if (
+            cached
+            and cached.get("size") == actual_size
+            and cached.get("mtime_ns") == st.st_mtime_ns
+            and expected_digest is not None
+            and hmac.compare_digest(_parse_digest(cached.get("hash")) or b"", expected_digest)
+        ):
+            return {
+                "file": filename,
+                "status": "UNCHANGED",
+                "hash": cached["hash"]
+            }, cached
+        
+        # Check hash
+        actual_digest = hash_open_file(f, actual_size)
+    
+    actual_hash = actual_digest.hex()
+    if expected_digest is not None and hmac.compare_digest(actual_digest, expected_digest):
+        return {
+            "file": filename,
+            "status": "VERIFIED",
+            "hash": actual_hash
+        }, {
+            "size": actual_size,
+            "mtime_ns": st.st_mtime_ns,
+            "hash": actual_hash
+        }
+    
+    return {
+        "file": filename,
+        "status": "HASH_MISMATCH",
+        "expected_hash": expected_hash,
+        "actual_hash": actual_hash
+    }, None
+
+
+def open_manifest(manifest_path: Path) -> Tuple[dict, Iterable[dict]]:
+    """
+    Read the manifest header and its evidence entries.
+    
+    With ijson installed the entries are parsed lazily, so memory stays
+    flat however many files the bundle lists; otherwise the whole
+    manifest is loaded.
+    
+    Returns:
+        Tuple of (header fields, iterable of evidence file entries)
+    """
+    if not IJSON_AVAILABLE:
+        manifest = load_json(manifest_path)
+        header = {key: manifest.get(key) for key in MANIFEST_HEADER_FIELDS}
+        return header, manifest.get("evidence_files", [])
+    
+    # Header scalars may follow the entry list, so scan the event stream
+    header = dict.fromkeys(MANIFEST_HEADER_FIELDS)
+    remaining = set(MANIFEST_HEADER_FIELDS)
+    with open(manifest_path, 'rb') as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if prefix in remaining and event not in ("start_map", "start_array"):
+                header[prefix] = value
+                remaining.discard(prefix)
+                if not remaining:
+                    break
+    
+    def entries() -> Iterator[dict]:
+        with open(manifest_path, 'rb') as f:
+            yield from ijson.items(f, "evidence_files.item", use_float=True)
+    
+    return header, entries()
+
+
+def iter_verified(
+    evidence_files: Iterable[dict],
+    bundle_path: Path,
+    cache: dict,
+    workers: int
+) -> Iterator[Tuple[dict, Optional[dict]]]:
+    """
+    Verify files as entries arrive, yielding outcomes in manifest order.
+    
+    Only a bounded window of tasks is submitted ahead of the one being
+    reported, so hashing starts before the manifest is fully read.
+    """
+    evidence_dir = bundle_path / "evidence"
+    
+    if workers <= 1:
+        for info in evidence_files:
+            filename = info["filename"]
+            yield verify_file(info, evidence_dir / filename, cache.get(filename))
+        return
+    
+    window = workers * TASKS_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for info in evidence_files:
+            filename = info["filename"]
+            pending.append(pool.submit(
+                verify_file, info, evidence_dir / filename, cache.get(filename)
+            ))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        
+        while pending:
+            yield pending.popleft().result()
+
+
+def verify_bundle(
+    bundle_path: Path,
+    generate_report: bool = False,
+    max_workers: Optional[int] = None,
+    use_cache: bool = False
+) -> bool:
     """
     Verify integrity of an export bundle.
     
     Args:
         bundle_path: Path to the bundle directory
         generate_report: Whether to write a verification report
+        max_workers: Hashing processes (defaults to CPU count)
+        use_cache: Skip files unchanged since a previous cached run;
+            ignored when generating a report, which always rehashes
         
     Returns:
         True if all files verify successfully
@@ -48,83 +334,79 @@ def verify_bundle(bundle_path: Path, generate_report: bool = False) -> bool:
         print(f"ERROR: Manifest not found at {manifest_path}")
         return False
     
-    with open(manifest_path, 'r') as f:
-        manifest = json.load(f)
+    header, evidence_files = open_manifest(manifest_path)
     
-    print(f"Bundle version: {manifest.get('version', 'unknown')}")
-    print(f"Generated at: {manifest.get('generated_at', 'unknown')}")
-    print(f"Attempt ID: {manifest.get('attempt_id', 'unknown')}")
+    print(f"Bundle version: {header['version'] or 'unknown'}")
+    print(f"Generated at: {header['generated_at'] or 'unknown'}")
+    print(f"Attempt ID: {header['attempt_id'] or 'unknown'}")
     print()
     
-    # Verify each evidence file
-    evidence_files = manifest.get("evidence_files", [])
-    
-    if not evidence_files:
-        print("WARNING: No evidence files in manifest")
+    if use_cache and generate_report:
+        print("NOTE: Ignoring the verification cache; reports rehash every file")
+        print()
+        use_cache = False
     
     passed = 0
+    unchanged = 0
     failed = 0
     results = []
     
-    for file_info in evidence_files:
-        filename = file_info["filename"]
-        expected_hash = file_info["hash_sha256"]
-        expected_size = file_info.get("size_bytes")
-        
-        file_path = bundle_path / "evidence" / filename
+    # Hash files in parallel; results come back in manifest order
+    cache = load_hash_cache(bundle_path) if use_cache else {}
+    workers = max_workers or os.cpu_count() or 1
+    if isinstance(evidence_files, list):
+        workers = min(workers, len(evidence_files))
+    
+    outcomes = iter_verified(evidence_files, bundle_path, cache, workers)
+    
+    new_cache = {}
+    for result, cache_entry in outcomes:
+        filename = result["file"]
+        status = result["status"]
         
-        if not file_path.exists():
+        if status == "VERIFIED":
+            print(f"PASS: {filename}")
+            passed += 1
+            new_cache[filename] = cache_entry
+        elif status == "UNCHANGED":
+            print(f"SKIP: {filename} - Unchanged since last verified (not rehashed)")
+            unchanged += 1
+            new_cache[filename] = cache_entry
+        elif status == "NOT_FOUND":
             print(f"FAIL: {filename} - File not found")
             failed += 1
-            results.append({
-                "file": filename,
-                "status": "NOT_FOUND",
-                "error": "File does not exist"
-            })
-            continue
-        
-        # Check size
-        actual_size = file_path.stat().st_size
-        if expected_size and actual_size != expected_size:
-            print(f"FAIL: {filename} - Size mismatch (expected {expected_size}, got {actual_size})")
+        elif status == "SIZE_MISMATCH":
+            print(f"FAIL: {filename} - Size mismatch (expected {result['expected_size']}, got {result['actual_size']})")
             failed += 1
-            results.append({
-                "file": filename,
-                "status": "SIZE_MISMATCH",
-                "expected_size": expected_size,
-                "actual_size": actual_size
-            })
-            continue
-        
-        # Check hash
-        actual_hash = compute_hash(file_path)
-        
-        if actual_hash.lower() == expected_hash.lower():
-            print(f"PASS: {filename}")
-            passed += 1
-            results.append({
-                "file": filename,
-                "status": "VERIFIED",
-                "hash": actual_hash
-            })
         else:
             print(f"FAIL: {filename} - Hash mismatch")
-            print(f"       Expected: {expected_hash}")
-            print(f"       Actual:   {actual_hash}")
+            print(f"       Expected: {result['expected_hash']}")
+            print(f"       Actual:   {result['actual_hash']}")
             failed += 1
-            results.append({
-                "file": filename,
-                "status": "HASH_MISMATCH",
-                "expected_hash": expected_hash,
-                "actual_hash": actual_hash
-            })
+        
+        results.append(result)
+    
+    if not results:
+        print("WARNING: No evidence files in manifest")
+    
+    if use_cache and new_cache != cache:
+        save_hash_cache(bundle_path, new_cache)
     
     # Summary
     print()
     print("=" * 60)
-    print(f"SUMMARY: {passed} passed, {failed} failed")
+    if use_cache:
+        print(f"SUMMARY: {passed} passed, {unchanged} unchanged, {failed} failed")
+    else:
+        print(f"SUMMARY: {passed} passed, {failed} failed")
     
-    overall_status = "VERIFIED" if failed == 0 else "FAILED"
+    # Only a run that hashed every file may report VERIFIED
+    if failed:
+        overall_status = "FAILED"
+    elif unchanged:
+        overall_status = "UNCHANGED"
+    else:
+        overall_status = "VERIFIED"
     print(f"OVERALL STATUS: {overall_status}")
     
     # Generate report if requested
@@ -132,9 +414,9 @@ def verify_bundle(bundle_path: Path, generate_report: bool = False) -> bool:
         report = {
             "verification_time": datetime.now().isoformat(),
             "bundle_path": str(bundle_path),
-            "manifest_version": manifest.get("version"),
-            "attempt_id": manifest.get("attempt_id"),
-            "total_files": len(evidence_files),
+            "manifest_version": header["version"],
+            "attempt_id": header["attempt_id"],
+            "total_files": len(results),
             "passed": passed,
             "failed": failed,
             "overall_status": overall_status,
@@ -142,8 +424,7 @@ def verify_bundle(bundle_path: Path, generate_report: bool = False) -> bool:
         }
         
         report_path = bundle_path / "verification_report.json"
-        with open(report_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        write_json(report_path, report, indent=True)
         
         print(f"\nReport saved to: {report_path}")
     
@@ -154,6 +435,12 @@ def main():
     parser = argparse.ArgumentParser(description="Verify export bundle integrity")
     parser.add_argument("bundle_path", help="Path to the export bundle directory")
     parser.add_argument("--report", action="store_true", help="Generate verification report")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing processes (default: CPU count)")
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Skip files unchanged since a previous --cache run (quick re-checks only; ignored with --report)"
+    )
     
     args = parser.parse_args()
     
@@ -163,7 +450,7 @@ def main():
         print(f"ERROR: Bundle path does not exist: {bundle_path}")
         sys.exit(1)
     
-    success = verify_bundle(bundle_path, args.report)
+    success = verify_bundle(bundle_path, args.report, args.workers, args.cache)
     
     sys.exit(0 if success else 1)
 
@@ -1,20 +1,60 @@
 """AI detection modules for Student Exam Application"""
 
-from student_app.app.ai.face_detector import FaceDetector, get_face_detector
-from student_app.app.ai.head_pose import HeadPoseEstimator, get_head_pose_estimator
-from student_app.app.ai.gaze import GazeTracker, get_gaze_tracker
-from student_app.app.ai.audio_monitor import AudioMonitor, get_audio_monitor
-from student_app.app.ai.event_classifier import EventClassifier, get_event_classifier
-from student_app.app.ai.face_verifier import (
-    FaceVerifier, get_face_verifier, is_face_verification_available
-)
+import importlib
+from typing import TYPE_CHECKING
+
+# Submodules pull in OpenCV, MediaPipe, face_recognition and PyAudio, so
+# they are imported on first attribute access (PEP 562) rather than here.
+_LAZY_EXPORTS = {
+    "FaceDetector": "face_detector",
+    "get_face_detector": "face_detector",
+    "FaceMeshProvider": "face_mesh",
+    "get_face_mesh_provider": "face_mesh",
+    "HeadPoseEstimator": "head_pose",
+    "get_head_pose_estimator": "head_pose",
+    "GazeTracker": "gaze",
+    "get_gaze_tracker": "gaze",
+    "AudioMonitor": "audio_monitor",
+    "get_audio_monitor": "audio_monitor",
+    "EventClassifier": "event_classifier",
+    "get_event_classifier": "event_classifier",
+    "FaceVerifier": "face_verifier",
+    "get_face_verifier": "face_verifier",
+    "is_face_verification_available": "face_verifier",
+}
+
+if TYPE_CHECKING:
+    from student_app.app.ai.face_detector import FaceDetector, get_face_detector
+    from student_app.app.ai.face_mesh import FaceMeshProvider, get_face_mesh_provider
+    from student_app.app.ai.head_pose import HeadPoseEstimator, get_head_pose_estimator
+    from student_app.app.ai.gaze import GazeTracker, get_gaze_tracker
+    from student_app.app.ai.audio_monitor import AudioMonitor, get_audio_monitor
+    from student_app.app.ai.event_classifier import EventClassifier, get_event_classifier
+    from student_app.app.ai.face_verifier import (
+        FaceVerifier, get_face_verifier, is_face_verification_available
+    )
 
 __all__ = [
     "FaceDetector", "get_face_detector",
-    "HeadPoseEstimator", "get_head_pose_estimator", 
+    "FaceMeshProvider", "get_face_mesh_provider",
+    "HeadPoseEstimator", "get_head_pose_estimator",
     "GazeTracker", "get_gaze_tracker",
     "AudioMonitor", "get_audio_monitor",
     "EventClassifier", "get_event_classifier",
     "FaceVerifier", "get_face_verifier", "is_face_verification_available",
 ]
 
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(f"{__name__}.{module_name}")
+    value = getattr(module, name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
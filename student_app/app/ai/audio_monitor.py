@@ -5,14 +5,17 @@ Voice Activity Detection (VAD) and audio analysis for detecting
 speech, multiple voices, and suspicious audio patterns.
 """
 
+import functools
 import logging
+import math
 import threading
 import queue
 import time
 import numpy as np
-from typing import Optional, Callable, List
+from typing import Optional, Callable, Deque, Tuple
+from collections import deque
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
@@ -57,12 +60,18 @@ class AudioMonitor:
     CHANNELS = 1
     CHUNK_DURATION_MS = 30  # WebRTC VAD requires 10, 20, or 30ms
     CHUNK_SIZE = int(SAMPLE_RATE * CHUNK_DURATION_MS / 1000)
+    READ_BATCH_CHUNKS = 4  # VAD chunks fetched per stream read (~120ms)
     FORMAT = None  # Set in __init__ based on availability
     
     # Detection parameters
     ENERGY_THRESHOLD = 0.02
     VOICE_MIN_DURATION_MS = 500  # Minimum voice duration to trigger event
     MULTI_VOICE_THRESHOLD = 0.6
+    MAX_TRACKED_SEGMENTS = 256
+    PATTERN_CHUNKS = 50  # Chunks (~1.5s) in the speech-ratio history
+    
+    # int16 PCM full scale
+    PCM_FULL_SCALE = 32768.0
     
     def __init__(
         self,
@@ -92,7 +101,17 @@ class AudioMonitor:
         # State
         self._voice_active = False
         self._voice_start_time: Optional[datetime] = None
-        self._recent_voice_segments: List[float] = []
+        # (monotonic end time, duration_ms) of significant voice segments,
+        # oldest first; pruned lazily against the query window
+        self._recent_voice_segments: Deque[Tuple[float, float]] = deque(
+            maxlen=self.MAX_TRACKED_SEGMENTS
+        )
+
+        # Voiced/unvoiced decisions for the last PATTERN_CHUNKS chunks, one
+        # bit per chunk (newest in bit 0), for the event confidence
+        self._speech_pattern = 0
+        self._speech_pattern_len = 0
+        self._speech_pattern_mask = (1 << self.PATTERN_CHUNKS) - 1
     
     def start(self):
         """Start audio monitoring."""
@@ -139,18 +158,31 @@ class AudioMonitor:
                 rate=self.SAMPLE_RATE,
                 input=True,
                 input_device_index=self.device_index,
-                frames_per_buffer=self.CHUNK_SIZE
+                frames_per_buffer=self.CHUNK_SIZE * self.READ_BATCH_CHUNKS
             )
             
             logger.info("Audio stream opened")
             
+            # Read several VAD chunks per call so the Python side wakes up
+            # once per batch rather than once per 30ms chunk
+            batch_frames = self.CHUNK_SIZE * self.READ_BATCH_CHUNKS
+            chunk_bytes = self.CHUNK_SIZE * 2  # int16 mono
+            chunk_duration = timedelta(milliseconds=self.CHUNK_DURATION_MS)
+            
             while self._running:
                 try:
-                    # Read audio chunk
-                    data = self._stream.read(self.CHUNK_SIZE, exception_on_overflow=False)
+                    # Read a batch of audio chunks
+                    data = self._stream.read(batch_frames, exception_on_overflow=False)
+                    batch_end = datetime.now()
+                    view = memoryview(data)
+                    n_chunks = len(data) // chunk_bytes
                     
-                    # Process chunk
-                    self._process_chunk(data)
+                    # Process each chunk, stamped with its capture time
+                    for i in range(n_chunks):
+                        self._process_chunk(
+                            view[i * chunk_bytes:(i + 1) * chunk_bytes],
+                            batch_end - chunk_duration * (n_chunks - 1 - i)
+                        )
                     
                 except Exception as e:
                     logger.debug(f"Audio read error: {e}")
@@ -165,27 +197,35 @@ class AudioMonitor:
             if self._audio:
                 self._audio.terminate()
     
-    def _process_chunk(self, data: bytes):
-        """Process an audio chunk."""
-        # Convert to numpy array
-        audio = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
-        
-        # Compute RMS energy
-        energy = np.sqrt(np.mean(audio ** 2))
-        
-        # Voice activity detection
-        is_voice = False
+    def _process_chunk(self, data: bytes, now: Optional[datetime] = None):
+        """
+        Process an audio chunk.
         
+        Args:
+            data: One CHUNK_SIZE block of int16 PCM (bytes-like)
+            now: Capture time of the chunk (defaults to the current time)
+        """
+        # Voice activity detection. WebRTC VAD works on the raw int16
+        # bytes, so the float energy is only computed without it.
+        is_voice = None
+
         if self._vad:
             try:
                 is_voice = self._vad.is_speech(data, self.SAMPLE_RATE)
             except Exception:
-                is_voice = energy > self.ENERGY_THRESHOLD
-        else:
-            is_voice = energy > self.ENERGY_THRESHOLD
+                is_voice = None
+
+        if is_voice is None:
+            is_voice = self._compute_energy(data) > self.ENERGY_THRESHOLD
+        
+        self._speech_pattern = (
+            (self._speech_pattern << 1) | bool(is_voice)
+        ) & self._speech_pattern_mask
+        if self._speech_pattern_len < self.PATTERN_CHUNKS:
+            self._speech_pattern_len += 1
         
         # Track voice activity
-        now = datetime.now()
+        now = now or datetime.now()
         
         if is_voice and not self._voice_active:
             # Voice started
@@ -201,30 +241,63 @@ class AudioMonitor:
                 
                 if duration_ms >= self.VOICE_MIN_DURATION_MS:
                     # Significant voice detected
-                    self._recent_voice_segments.append(duration_ms)
-                    
+                    self._recent_voice_segments.append((time.monotonic(), duration_ms))
+
                     event = AudioEvent(
                         event_type="voice_detected",
                         timestamp=self._voice_start_time,
                         duration_ms=duration_ms,
-                        confidence=min(1.0, energy * 10)
+                        confidence=self.get_speech_ratio()
                     )
                     
                     if self.on_event:
                         self.on_event(event)
+
+    def _compute_energy(self, data: bytes) -> float:
+        """Compute normalized RMS energy of an int16 PCM chunk."""
+        samples = np.frombuffer(data, dtype=np.int16)
+        n = samples.size
+        if n == 0:
+            return 0.0
         
-        # Cleanup old segments (keep last 60 seconds)
-        # This would need proper timestamp tracking in production
-    
+        # Sum of squares accumulated in int64 straight from the samples, so
+        # no float copy of the chunk is made; scaling is applied once
+        sum_sq = int(np.einsum("i,i->", samples, samples, dtype=np.int64))
+        return math.sqrt(sum_sq / n) / self.PCM_FULL_SCALE
+
     def get_voice_activity_count(self, window_seconds: float = 60.0) -> int:
         """Get count of voice activity events in recent window."""
-        return len(self._recent_voice_segments)
+        segments = self._recent_voice_segments
+        cutoff = time.monotonic() - window_seconds
+        
+        # Segments are appended in time order, so only the expired prefix
+        # is walked. Indexing (rather than iterating) tolerates the audio
+        # thread appending concurrently.
+        count = len(segments)
+        expired = 0
+        while expired < count and segments[expired][0] < cutoff:
+            expired += 1
+        return count - expired
+    
+    def get_speech_ratio(self) -> float:
+        """Get the fraction of voiced chunks in the recent history (0-1)."""
+        if not self._speech_pattern_len:
+            return 0.0
+        return bin(self._speech_pattern).count("1") / self._speech_pattern_len
     
     def is_voice_active(self) -> bool:
         """Check if voice is currently active."""
         return self._voice_active
 
 
+@functools.lru_cache(maxsize=8)
+def _rfft_frequencies(n: int, sample_rate: int) -> np.ndarray:
+    """Bin frequencies for an n-sample rFFT (cached; chunk sizes repeat)."""
+    freqs = np.fft.rfftfreq(n, 1 / sample_rate)
+    freqs.flags.writeable = False
+    return freqs
+
+
 class SimpleAudioAnalyzer:
     """
     Simple audio analyzer that works without real-time capture.
@@ -251,21 +324,19 @@ class SimpleAudioAnalyzer:
     def compute_spectral_features(audio: np.ndarray, sample_rate: int) -> dict:
         """Compute spectral features for audio classification."""
         # Simplified spectral analysis
-        fft = np.fft.rfft(audio)
-        freqs = np.fft.rfftfreq(len(audio), 1 / sample_rate)
-        magnitude = np.abs(fft)
+        magnitude = np.abs(np.fft.rfft(audio))
+        freqs = _rfft_frequencies(len(audio), sample_rate)
         
         # Find dominant frequency
-        dominant_idx = np.argmax(magnitude)
-        dominant_freq = freqs[dominant_idx]
+        dominant_freq = freqs[magnitude.argmax()]
         
-        # Spectral centroid
-        spectral_centroid = np.sum(freqs * magnitude) / (np.sum(magnitude) + 1e-10)
+        # Spectral centroid and energy as dot products (no temporaries)
+        spectral_centroid = np.dot(freqs, magnitude) / (magnitude.sum() + 1e-10)
         
         return {
             "dominant_frequency": dominant_freq,
             "spectral_centroid": spectral_centroid,
-            "total_energy": np.sum(magnitude ** 2)
+            "total_energy": np.dot(magnitude, magnitude)
         }
 
 
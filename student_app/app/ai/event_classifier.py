@@ -5,13 +5,17 @@ Rule engine for classifying and aggregating detection events into
 malpractice violations with severity scoring.
 """
 
+import bisect
+import heapq
 import logging
 from collections import deque
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Callable, Any
+from itertools import islice
+from datetime import datetime
+from typing import Optional, List, Dict, Callable, Any, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import threading
+import time
 
 from student_app.app.config import get_config
 
@@ -64,6 +68,12 @@ class DetectionEvent:
     confidence: float
     duration_ms: float = 0
     details: Optional[Dict[str, Any]] = None
+    # timestamp as POSIX seconds, so the rule engine does window and
+    # duration math on floats instead of datetime/timedelta objects
+    epoch: float = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.epoch = self.timestamp.timestamp()
     
     @property
     def timestamp_iso(self) -> str:
@@ -80,6 +90,8 @@ class Violation:
     occurred_at: datetime = field(default_factory=datetime.now)
     evidence_start: Optional[datetime] = None
     evidence_end: Optional[datetime] = None
+    # Creation time on the monotonic clock, for window checks
+    occurred_at_ns: int = field(default_factory=time.monotonic_ns, repr=False, compare=False)
     
     def __post_init__(self):
         # Calculate evidence window from events
@@ -106,6 +118,24 @@ class EventClassifier:
     10. Seat swap/multiple people
     """
     
+    # Events kept per type. The object and timestamp queues share this
+    # bound so they evict in lockstep and stay index-aligned.
+    EVENT_HISTORY = 1000
+    
+    # Types whose history is queried (violation evidence). Other types are
+    # handled from the incoming event alone, so they are not stored.
+    WINDOWED_EVENT_TYPES = (EventType.HEAD_LEFT, EventType.HEAD_RIGHT)
+    
+    # Repeats of a violation type within this window are dropped
+    DEBOUNCE_SECONDS = 30.0
+    
+    # Head rotation frequency (Scenario 1) and burst (Scenario 4) windows
+    FREQUENCY_WINDOW_SECONDS = 300.0
+    BURST_WINDOW_SECONDS = 30.0
+    
+    # Combined pattern (Scenario 3) window
+    COMBINED_WINDOW_NS = 10 * 60 * 1_000_000_000
+    
     def __init__(
         self,
         on_violation: Optional[Callable[[Violation], None]] = None
@@ -122,23 +152,39 @@ class EventClassifier:
         # Event storage with thread-safe access
         self._lock = threading.Lock()
         
-        # Time-windowed event queues
+        # Time-windowed event queues, with a parallel queue of their epoch
+        # timestamps (append-ordered) for bisecting window cutoffs
         self._events: Dict[EventType, deque] = {}
-        for event_type in EventType:
-            self._events[event_type] = deque(maxlen=1000)
+        self._event_times: Dict[EventType, deque] = {}
+        for event_type in self.WINDOWED_EVENT_TYPES:
+            self._events[event_type] = deque(maxlen=self.EVENT_HISTORY)
+            self._event_times[event_type] = deque(maxlen=self.EVENT_HISTORY)
         
-        # Ongoing state tracking
-        self._current_head_rotation_start: Optional[datetime] = None
+        # Ongoing state tracking (start times as event epoch seconds)
+        self._current_head_rotation_start: Optional[float] = None
         self._current_head_rotation_direction: Optional[str] = None
-        self._current_face_absent_start: Optional[datetime] = None
-        self._current_gaze_away_start: Optional[datetime] = None
+        self._current_face_absent_start: Optional[float] = None
+        self._current_gaze_away_start: Optional[float] = None
         
         # Violation tracking
         self._recent_violations: deque = deque(maxlen=100)
+        # Violations created under the lock, handed to on_violation once
+        # it is released (the callback does network I/O)
+        self._pending_violations: List[Violation] = []
+        # Additional violation listeners. Registration replaces the tuple
+        # under _listeners_lock; notification reads the current tuple
+        # without locking or copying.
+        self._listeners: Tuple[Callable[[Violation], None], ...] = ()
+        self._listeners_lock = threading.Lock()
+        # Monotonic time each violation type was last created, for debouncing
+        self._last_violation_at: Dict[str, float] = {}
         self._warning_count = 0
         
-        # Burst tracking for 30s windows
-        self._burst_windows: Dict[str, List[datetime]] = {}
+        # Head rotation timestamps inside the frequency (5 min) and burst
+        # (30 s) windows, oldest first. Each rotation is appended and expired
+        # entries are dropped from the left, so len() is the window count.
+        self._frequency_window: deque = deque()
+        self._burst_window: deque = deque()
     
     def add_event(self, event: DetectionEvent):
         """
@@ -148,33 +194,45 @@ class EventClassifier:
             event: The detection event to process
         """
         with self._lock:
-            # Store event
-            self._events[event.event_type].append(event)
+            # Store event if its type is windowed
+            events = self._events.get(event.event_type)
+            if events is not None:
+                events.append(event)
+                self._event_times[event.event_type].append(event.epoch)
             
             # Process based on event type
             self._process_event(event)
+            pending = self._take_pending_violations()
+        
+        self._notify_violations(pending)
+    
+    def add_listener(self, callback: Callable[[Violation], None]):
+        """
+        Register a callback for violations (alongside on_violation).
+        
+        Args:
+            callback: Called with each violation, outside the classifier lock
+        """
+        with self._listeners_lock:
+            self._listeners = self._listeners + (callback,)
+    
+    def remove_listener(self, callback: Callable[[Violation], None]):
+        """
+        Unregister a callback added with add_listener.
+        
+        Args:
+            callback: Previously registered callback
+        """
+        with self._listeners_lock:
+            self._listeners = tuple(cb for cb in self._listeners if cb != callback)
     
     def _process_event(self, event: DetectionEvent):
         """Process a single event through the rule engine."""
         
         # Route to appropriate handler
-        handlers = {
-            EventType.HEAD_LEFT: self._handle_head_rotation,
-            EventType.HEAD_RIGHT: self._handle_head_rotation,
-            EventType.FACE_ABSENT: self._handle_face_absent,
-            EventType.FACE_MULTIPLE: self._handle_multiple_faces,
-            EventType.GAZE_AWAY: self._handle_gaze_away,
-            EventType.PHONE_DETECTED: self._handle_phone_detected,
-            EventType.VOICE_DETECTED: self._handle_voice_detected,
-            EventType.MULTI_VOICE: self._handle_multi_voice,
-            EventType.APP_SWITCH: self._handle_app_switch,
-            EventType.PERSON_SWAP: self._handle_person_swap,
-            EventType.IMPERSONATION: self._handle_impersonation,
-        }
-        
-        handler = handlers.get(event.event_type)
+        handler = self._HANDLERS.get(event.event_type)
         if handler:
-            handler(event)
+            handler(self, event)
     
     # ==================== Scenario 1 & 2: Head Rotation ====================
     
@@ -185,8 +243,8 @@ class EventClassifier:
         # Track ongoing rotation for duration-based detection (Scenario 2)
         if self._current_head_rotation_direction == direction:
             # Continuing rotation
-            if self._current_head_rotation_start:
-                duration = (event.timestamp - self._current_head_rotation_start).total_seconds()
+            if self._current_head_rotation_start is not None:
+                duration = event.epoch - self._current_head_rotation_start
                 
                 # Scenario 2: Long duration rotation
                 if duration >= self.config.DURATION_HIGH_SECONDS:
@@ -195,14 +253,14 @@ class EventClassifier:
                         severity=8,
                         description=f"Head turned {direction} for {duration:.1f} seconds",
                         events=[event],
-                        evidence_start=self._current_head_rotation_start
+                        evidence_start=datetime.fromtimestamp(self._current_head_rotation_start)
                     )
                     # Reset tracking
                     self._current_head_rotation_start = None
         else:
             # New rotation direction
             self._current_head_rotation_direction = direction
-            self._current_head_rotation_start = event.timestamp
+            self._current_head_rotation_start = event.epoch
         
         # Scenario 1: Frequency-based detection (5-minute window)
         self._check_frequency_based_violation(event)
@@ -212,42 +270,38 @@ class EventClassifier:
     
     def _check_frequency_based_violation(self, event: DetectionEvent):
         """Scenario 1: Check frequency of head turns in 5-minute window."""
-        window = timedelta(minutes=5)
-        cutoff = event.timestamp - window
+        window = self.FREQUENCY_WINDOW_SECONDS
         
         # Count events in window
-        count = 0
-        for e in list(self._events[EventType.HEAD_LEFT]) + list(self._events[EventType.HEAD_RIGHT]):
-            if e.timestamp >= cutoff:
-                count += 1
+        count = self._slide_window(self._frequency_window, event.epoch, window)
         
-        if count >= self.config.TH_FREQ:
+        # Thresholds are read once per event rather than snapshotted at
+        # construction, so runtime config changes still take effect
+        threshold = self.config.TH_FREQ
+        if count >= threshold:
             # Calculate severity based on count
-            severity = min(10, 4 + (count - self.config.TH_FREQ))
+            severity = min(10, 4 + (count - threshold))
             
             self._create_violation(
                 violation_type="frequent_head_rotation",
                 severity=severity,
-                description=f"{count} head rotations in 5 minutes (threshold: {self.config.TH_FREQ})",
+                description=f"{count} head rotations in 5 minutes (threshold: {threshold})",
                 events=self._get_recent_events([EventType.HEAD_LEFT, EventType.HEAD_RIGHT], window)
             )
     
     def _check_burst_violation(self, event: DetectionEvent):
         """Scenario 4: Check for burst of rotations in 30-second window."""
-        window = timedelta(seconds=30)
-        cutoff = event.timestamp - window
+        window = self.BURST_WINDOW_SECONDS
         
         # Count events in window
-        count = 0
-        for e in list(self._events[EventType.HEAD_LEFT]) + list(self._events[EventType.HEAD_RIGHT]):
-            if e.timestamp >= cutoff:
-                count += 1
+        count = self._slide_window(self._burst_window, event.epoch, window)
         
-        if count >= self.config.TH_BURST:
+        threshold = self.config.TH_BURST
+        if count >= threshold:
             self._create_violation(
                 violation_type="burst_head_rotation",
                 severity=6,
-                description=f"{count} head rotations in 30 seconds (threshold: {self.config.TH_BURST})",
+                description=f"{count} head rotations in 30 seconds (threshold: {threshold})",
                 events=self._get_recent_events([EventType.HEAD_LEFT, EventType.HEAD_RIGHT], window)
             )
     
@@ -256,9 +310,9 @@ class EventClassifier:
     def _handle_face_absent(self, event: DetectionEvent):
         """Handle face absent events (Scenario 5)."""
         if self._current_face_absent_start is None:
-            self._current_face_absent_start = event.timestamp
+            self._current_face_absent_start = event.epoch
         else:
-            duration = (event.timestamp - self._current_face_absent_start).total_seconds()
+            duration = event.epoch - self._current_face_absent_start
             
             if duration >= self.config.T_ABSENT_SECONDS:
                 self._create_violation(
@@ -266,12 +320,16 @@ class EventClassifier:
                     severity=7,
                     description=f"Face not visible for {duration:.1f} seconds",
                     events=[event],
-                    evidence_start=self._current_face_absent_start
+                    evidence_start=datetime.fromtimestamp(self._current_face_absent_start)
                 )
                 self._current_face_absent_start = None
     
     def reset_face_absent(self):
         """Reset face absent tracking when face is detected."""
+        # Called on nearly every frame; skip the lock when already clear.
+        # A concurrent add_event is ordered either side of the reset anyway.
+        if self._current_face_absent_start is None:
+            return
         with self._lock:
             self._current_face_absent_start = None
     
@@ -280,9 +338,9 @@ class EventClassifier:
     def _handle_gaze_away(self, event: DetectionEvent):
         """Handle gaze away events (Scenario 6)."""
         if self._current_gaze_away_start is None:
-            self._current_gaze_away_start = event.timestamp
+            self._current_gaze_away_start = event.epoch
         else:
-            duration = (event.timestamp - self._current_gaze_away_start).total_seconds()
+            duration = event.epoch - self._current_gaze_away_start
             
             if duration >= self.config.T_GAZE_SECONDS:
                 self._create_violation(
@@ -295,6 +353,9 @@ class EventClassifier:
     
     def reset_gaze_tracking(self):
         """Reset gaze tracking when looking at screen."""
+        # Lock-free fast path, as in reset_face_absent
+        if self._current_gaze_away_start is None:
+            return
         with self._lock:
             self._current_gaze_away_start = None
     
@@ -373,6 +434,22 @@ class EventClassifier:
             events=[event]
         )
     
+    # Event routing table: plain functions, shared by all instances and
+    # called with the classifier explicitly
+    _HANDLERS: Dict[EventType, Callable[["EventClassifier", DetectionEvent], None]] = {
+        EventType.HEAD_LEFT: _handle_head_rotation,
+        EventType.HEAD_RIGHT: _handle_head_rotation,
+        EventType.FACE_ABSENT: _handle_face_absent,
+        EventType.FACE_MULTIPLE: _handle_multiple_faces,
+        EventType.GAZE_AWAY: _handle_gaze_away,
+        EventType.PHONE_DETECTED: _handle_phone_detected,
+        EventType.VOICE_DETECTED: _handle_voice_detected,
+        EventType.MULTI_VOICE: _handle_multi_voice,
+        EventType.APP_SWITCH: _handle_app_switch,
+        EventType.PERSON_SWAP: _handle_person_swap,
+        EventType.IMPERSONATION: _handle_impersonation,
+    }
+    
     # ==================== Scenario 3: Combined Patterns ====================
     
     def check_combined_patterns(self):
@@ -381,20 +458,24 @@ class EventClassifier:
         
         Called periodically to detect escalation patterns.
         """
+        # A clean exam has no violations at all; skip the lock on those
+        # ticks, as in reset_face_absent
+        if not self._recent_violations:
+            return
+        
         with self._lock:
-            window = timedelta(minutes=10)
-            now = datetime.now()
-            cutoff = now - window
+            cutoff_ns = time.monotonic_ns() - self.COMBINED_WINDOW_NS
             
-            # Count different violation types in window
-            violation_counts: Dict[str, int] = {}
-            for v in self._recent_violations:
-                if v.occurred_at >= cutoff:
-                    violation_counts[v.violation_type] = violation_counts.get(v.violation_type, 0) + 1
+            # Violations are appended in time order, so walk back from the
+            # newest and stop at the first one outside the window. The
+            # monotonic stamp keeps that order even if the wall clock jumps.
+            total_violations = 0
+            for v in reversed(self._recent_violations):
+                if v.occurred_at_ns < cutoff_ns:
+                    break
+                total_violations += 1
             
             # Combined detection rules
-            total_violations = sum(violation_counts.values())
-            
             if total_violations >= 5:
                 # Multiple different violations indicate systematic cheating
                 self._create_violation(
@@ -403,6 +484,9 @@ class EventClassifier:
                     description=f"Combined violation pattern: {total_violations} violations in 10 minutes",
                     events=[]
                 )
+            pending = self._take_pending_violations()
+        
+        self._notify_violations(pending)
     
     # ==================== Utility Methods ====================
     
@@ -414,13 +498,14 @@ class EventClassifier:
         events: List[DetectionEvent],
         evidence_start: Optional[datetime] = None
     ):
-        """Create and emit a violation."""
+        """Create a violation and queue it for the callback (lock held)."""
         # Debounce: check if same violation type was recently created
-        recent_cutoff = datetime.now() - timedelta(seconds=30)
-        for v in self._recent_violations:
-            if v.violation_type == violation_type and v.occurred_at >= recent_cutoff:
-                logger.debug(f"Debounced violation: {violation_type}")
-                return
+        now = time.monotonic()
+        last = self._last_violation_at.get(violation_type)
+        if last is not None and now - last <= self.DEBOUNCE_SECONDS:
+            logger.debug(f"Debounced violation: {violation_type}")
+            return
+        self._last_violation_at[violation_type] = now
         
         violation = Violation(
             violation_type=violation_type,
@@ -436,24 +521,64 @@ class EventClassifier:
         
         logger.warning(f"Violation detected: {violation_type} (severity {severity})")
         
-        if self.on_violation:
-            self.on_violation(violation)
+        self._pending_violations.append(violation)
+    
+    def _take_pending_violations(self) -> List[Violation]:
+        """Detach the violations created since the last call (lock held)."""
+        if not self._pending_violations:
+            return []
+        pending = self._pending_violations
+        self._pending_violations = []
+        return pending
+    
+    def _notify_violations(self, violations: List[Violation]):
+        """Invoke the violation callbacks; called after releasing the lock."""
+        if not violations:
+            return
+        
+        on_violation = self.on_violation
+        listeners = self._listeners
+        for violation in violations:
+            if on_violation:
+                on_violation(violation)
+            for listener in listeners:
+                listener(violation)
     
     def _get_recent_events(
         self,
         event_types: List[EventType],
-        window: timedelta
+        window_seconds: float
     ) -> List[DetectionEvent]:
         """Get recent events of specified types within window."""
-        cutoff = datetime.now() - window
-        events = []
+        cutoff = time.time() - window_seconds
         
+        # Each queue is already in time order, so merge the in-window tails
+        # rather than concatenating and sorting
+        tails = []
         for event_type in event_types:
-            for e in self._events[event_type]:
-                if e.timestamp >= cutoff:
-                    events.append(e)
+            start = bisect.bisect_left(self._event_times[event_type], cutoff)
+            tails.append(islice(self._events[event_type], start, None))
+        
+        return list(heapq.merge(*tails, key=lambda e: e.epoch))
+    
+    @staticmethod
+    def _slide_window(window_times: deque, timestamp: float, window_seconds: float) -> int:
+        """
+        Add a timestamp to a sliding window and expire old entries.
         
-        return sorted(events, key=lambda e: e.timestamp)
+        Args:
+            window_times: Epoch timestamps in the window, oldest first
+            timestamp: New event epoch timestamp
+            window_seconds: Window length
+            
+        Returns:
+            Number of timestamps in the window ending at timestamp
+        """
+        window_times.append(timestamp)
+        cutoff = timestamp - window_seconds
+        while window_times[0] < cutoff:
+            window_times.popleft()
+        return len(window_times)
     
     def get_violation_count(self) -> int:
         """Get total number of violations."""
@@ -475,17 +600,26 @@ class EventClassifier:
         with self._lock:
             for q in self._events.values():
                 q.clear()
+            for q in self._event_times.values():
+                q.clear()
+            self._frequency_window.clear()
+            self._burst_window.clear()
             self._recent_violations.clear()
+            self._last_violation_at.clear()
             self._warning_count = 0
 
 
 # Global instance
 _classifier: Optional[EventClassifier] = None
+_classifier_lock = threading.Lock()
 
 
 def get_event_classifier() -> EventClassifier:
     """Get global event classifier instance."""
     global _classifier
+    # Double-checked so callers only lock until the instance exists
     if _classifier is None:
-        _classifier = EventClassifier()
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = EventClassifier()
     return _classifier
@@ -8,6 +8,7 @@ Model: SSD with ResNet-10 backbone (res10_300x300_ssd_iter_140000.caffemodel)
 import cv2
 import numpy as np
 import logging
+import threading
 from pathlib import Path
 from typing import List, Tuple, Optional
 from dataclasses import dataclass
@@ -47,16 +48,35 @@ class FaceDetector:
     # Model files (bundled with application)
     MODEL_FILE = "res10_300x300_ssd_iter_140000_fp16.caffemodel"
     CONFIG_FILE = "deploy.prototxt"
+    # Optional INT8-quantized ONNX export of the same SSD, preferred when
+    # present (same input and 7-column detection output)
+    INT8_MODEL_FILE = "res10_300x300_ssd_int8.onnx"
     
     # Detection parameters
     INPUT_SIZE = (300, 300)
     SCALE_FACTOR = 1.0
     MEAN_VALUES = (104.0, 177.0, 123.0)
     
+    # Motion gate: frames are compared at this size (grayscale) against
+    # the last frame that was actually run through the detector
+    MOTION_GATE_SIZE = (80, 60)
+    # Detection is forced after this many consecutive gated frames
+    MOTION_GATE_MAX_SKIPS = 10
+    
+    # DNN (backend, target) pairs, fastest first. Names are resolved on
+    # cv2.dnn since not every OpenCV build defines them all.
+    DNN_PREFERENCES = (
+        ("DNN_BACKEND_CUDA", "DNN_TARGET_CUDA_FP16"),
+        ("DNN_BACKEND_CUDA", "DNN_TARGET_CUDA"),
+        ("DNN_BACKEND_INFERENCE_ENGINE", "DNN_TARGET_CPU"),
+        ("DNN_BACKEND_OPENCV", "DNN_TARGET_CPU"),
+    )
+    
     def __init__(
         self,
         model_path: Optional[Path] = None,
-        confidence_threshold: float = 0.7
+        confidence_threshold: float = 0.7,
+        motion_threshold: float = 1.5
     ):
         """
         Initialize face detector.
@@ -64,9 +84,24 @@ class FaceDetector:
         Args:
             model_path: Path to model directory (contains .caffemodel and .prototxt)
             confidence_threshold: Minimum confidence for detection
+            motion_threshold: Mean grey-level change below which detect()
+                reuses the previous result (0 disables the gate)
         """
         self.confidence_threshold = confidence_threshold
+        self.motion_threshold = motion_threshold
         self._net = None
+        self._use_haar_fallback = False
+        
+        # Reused single-frame input buffers (see _detect_dnn)
+        width, height = self.INPUT_SIZE
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        self._blob = np.empty((1, 3, height, width), dtype=np.float32)
+        self._mean = np.array(self.MEAN_VALUES, dtype=np.float32).reshape(3, 1, 1)
+        
+        # Motion gate state
+        self._gate_reference: Optional[np.ndarray] = None
+        self._gate_faces: List[FaceDetection] = []
+        self._gate_skips = 0
         
         # Find model files
         if model_path is None:
@@ -77,7 +112,7 @@ class FaceDetector:
                 Path.home() / ".student_exam_app" / "models",
             ]
             for p in possible_paths:
-                if (p / self.MODEL_FILE).exists():
+                if (p / self.MODEL_FILE).exists() or (p / self.INT8_MODEL_FILE).exists():
                     model_path = p
                     break
         
@@ -87,13 +122,14 @@ class FaceDetector:
     def _load_model(self):
         """Load the DNN model."""
         try:
-            if self.model_path and (self.model_path / self.MODEL_FILE).exists():
+            if self.model_path and self._load_int8_model():
+                logger.info("Face detector INT8 model loaded from files")
+            elif self.model_path and (self.model_path / self.MODEL_FILE).exists():
                 model_file = str(self.model_path / self.MODEL_FILE)
                 config_file = str(self.model_path / self.CONFIG_FILE)
                 
                 self._net = cv2.dnn.readNetFromCaffe(config_file, model_file)
-                self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-                self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+                self._select_backend()
                 
                 logger.info("Face detector model loaded from files")
             else:
@@ -110,6 +146,76 @@ class FaceDetector:
             self._haar_cascade = cv2.CascadeClassifier(
                 cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
             )
+        
+        # Resolve the per-frame detection path once
+        self._detect_fn = self._detect_haar if self._use_haar_fallback else self._detect_dnn
+    
+    def _load_int8_model(self) -> bool:
+        """
+        Load the INT8 ONNX model if it is installed.
+        
+        Quantized convolutions move a quarter of the bytes of FP32 ones and
+        use the CPU's integer dot-product instructions where available.
+        
+        Returns:
+            True if the model was loaded and runs on some backend
+        """
+        model_file = self.model_path / self.INT8_MODEL_FILE
+        if not model_file.exists():
+            return False
+        
+        try:
+            self._net = cv2.dnn.readNetFromONNX(str(model_file))
+            self._select_backend()
+            return True
+        except Exception as e:
+            logger.warning(f"INT8 face model unusable, using Caffe model: {e}")
+            self._net = None
+            return False
+    
+    def _select_backend(self):
+        """
+        Use the fastest DNN backend that this machine can run.
+        
+        Each candidate the build reports as available is tried with a
+        warm-up forward pass; one that fails is skipped.
+        
+        Raises:
+            RuntimeError: If no backend could run the network
+        """
+        for backend_name, target_name in self.DNN_PREFERENCES:
+            backend = getattr(cv2.dnn, backend_name, None)
+            target = getattr(cv2.dnn, target_name, None)
+            if backend is None or target is None:
+                continue
+            
+            try:
+                if target not in cv2.dnn.getAvailableTargets(backend):
+                    continue
+                
+                self._net.setPreferableBackend(backend)
+                self._net.setPreferableTarget(target)
+                self._warm_up()
+            except Exception as e:
+                logger.debug(f"DNN backend {backend_name}/{target_name} unusable: {e}")
+                continue
+            
+            logger.info(f"Face detector using {backend_name}/{target_name}")
+            return
+        
+        raise RuntimeError("No usable DNN backend for face detection")
+    
+    def _warm_up(self):
+        """
+        Run one forward pass on a blank input.
+        
+        OpenCV finalizes the network (layer fusion, buffer allocation) on
+        the first forward(); doing it here keeps that cost out of the first
+        proctored frame.
+        """
+        blank = np.zeros((1, 3) + self.INPUT_SIZE[::-1], dtype=np.float32)
+        self._net.setInput(blank)
+        self._net.forward()
     
     def detect(self, frame: np.ndarray) -> List[FaceDetection]:
         """
@@ -124,18 +230,105 @@ class FaceDetector:
         if frame is None or frame.size == 0:
             return []
         
-        if hasattr(self, '_use_haar_fallback') and self._use_haar_fallback:
-            return self._detect_haar(frame)
+        # A student sitting still barely changes the picture between
+        # frames; reuse the last result instead of running the detector
+        small = None
+        if self.motion_threshold > 0:
+            small = cv2.cvtColor(
+                cv2.resize(frame, self.MOTION_GATE_SIZE, interpolation=cv2.INTER_AREA),
+                cv2.COLOR_BGR2GRAY
+            )
+            if (
+                self._gate_reference is not None
+                and self._gate_skips < self.MOTION_GATE_MAX_SKIPS
+                and cv2.mean(cv2.absdiff(small, self._gate_reference))[0] < self.motion_threshold
+            ):
+                self._gate_skips += 1
+                return list(self._gate_faces)
+        
+        faces = self._detect_fn(frame)
+        
+        if small is not None:
+            self._gate_reference = small
+            self._gate_faces = faces
+            self._gate_skips = 0
+        
+        return faces
+    
+    def detect_batch(
+        self,
+        frames: List[np.ndarray],
+        batch_size: int = 4
+    ) -> List[List[FaceDetection]]:
+        """
+        Detect faces in several frames.
+        
+        With the DNN model, frames are run through the network batch_size
+        at a time, amortizing the per-call overhead of forward().
         
-        return self._detect_dnn(frame)
+        Args:
+            frames: BGR images from OpenCV
+            batch_size: Frames per forward pass
+            
+        Returns:
+            Detected faces for each frame, in input order
+        """
+        results: List[List[FaceDetection]] = [[] for _ in frames]
+        valid = [i for i, f in enumerate(frames) if f is not None and f.size > 0]
+        
+        if self._use_haar_fallback:
+            for i in valid:
+                results[i] = self._detect_haar(frames[i])
+            return results
+        
+        for start in range(0, len(valid), max(1, batch_size)):
+            indices = valid[start:start + batch_size]
+            batch = self._detect_dnn_batch([frames[i] for i in indices])
+            for i, faces in zip(indices, batch):
+                results[i] = faces
+        
+        return results
     
     def _detect_dnn(self, frame: np.ndarray) -> List[FaceDetection]:
         """Detect faces using DNN model."""
-        h, w = frame.shape[:2]
+        return self._run_dnn(self._prepare_blob(frame), [frame])[0]
+    
+    def _detect_dnn_largest(self, frame: np.ndarray) -> Optional[FaceDetection]:
+        """Detect only the largest face using DNN model."""
+        rows = self._forward(self._prepare_blob(frame))
+        if not len(rows):
+            return None
         
-        # Prepare input blob
-        blob = cv2.dnn.blobFromImage(
-            frame,
+        # Pick the winner on the box array; only it becomes an object
+        boxes = self._scale_boxes(rows, np.array(frame.shape[1::-1]))
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        i = int(areas.argmax())
+        x1, y1, x2, y2 = boxes[i].tolist()
+        
+        return FaceDetection(
+            x=x1,
+            y=y1,
+            width=x2 - x1,
+            height=y2 - y1,
+            confidence=float(rows[i, 2])
+        )
+    
+    def _prepare_blob(self, frame: np.ndarray) -> np.ndarray:
+        """Build the single-frame network input in the reused blob."""
+        # Same preprocessing as blobFromImage (resize, subtract mean, HWC
+        # to CHW), written into persistent buffers instead of allocating
+        # a new ~1MB blob per frame
+        cv2.resize(frame, self.INPUT_SIZE, dst=self._resized)
+        np.subtract(self._resized.transpose(2, 0, 1), self._mean, out=self._blob[0])
+        if self.SCALE_FACTOR != 1.0:
+            self._blob *= self.SCALE_FACTOR
+        return self._blob
+    
+    def _detect_dnn_batch(self, frames: List[np.ndarray]) -> List[List[FaceDetection]]:
+        """Detect faces in one or more frames with a single forward pass."""
+        # Prepare input blob (N, 3, 300, 300)
+        blob = cv2.dnn.blobFromImages(
+            frames,
             self.SCALE_FACTOR,
             self.INPUT_SIZE,
             self.MEAN_VALUES,
@@ -143,32 +336,68 @@ class FaceDetector:
             crop=False
         )
         
+        return self._run_dnn(blob, frames)
+    
+    def _run_dnn(self, blob: np.ndarray, frames: List[np.ndarray]) -> List[List[FaceDetection]]:
+        """Run the network on a prepared blob and parse faces per frame."""
+        # Threshold, scale and clip all rows at once; only survivors
+        # become FaceDetection objects
+        rows = self._forward(blob)
+        
+        results: List[List[FaceDetection]] = [[] for _ in frames]
+        if not len(rows):
+            return results
+        
+        image_ids = rows[:, 0].astype(int)
+        sizes = np.array([frame.shape[1::-1] for frame in frames])[image_ids]  # (w, h)
+        boxes = self._scale_boxes(rows, sizes)
+        
+        for image_id, (x1, y1, x2, y2), confidence in zip(
+            image_ids.tolist(), boxes.tolist(), rows[:, 2].tolist()
+        ):
+            results[image_id].append(FaceDetection(
+                x=x1,
+                y=y1,
+                width=x2 - x1,
+                height=y2 - y1,
+                confidence=confidence
+            ))
+        
+        return results
+    
+    def _forward(self, blob: np.ndarray) -> np.ndarray:
+        """
+        Run the network and keep the confident detections.
+        
+        Args:
+            blob: Network input (N, 3, 300, 300)
+            
+        Returns:
+            Rows of [image_id, label, confidence, x1, y1, x2, y2], with box
+            corners relative to each frame's size
+        """
         self._net.setInput(blob)
-        detections = self._net.forward()
+        rows = self._net.forward()[0, 0]
+        return rows[rows[:, 2] > self.confidence_threshold]
+    
+    @staticmethod
+    def _scale_boxes(rows: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        """
+        Convert relative box corners to pixel coordinates.
         
-        faces = []
-        for i in range(detections.shape[2]):
-            confidence = detections[0, 0, i, 2]
+        Args:
+            rows: Detection rows from _forward
+            sizes: Frame (width, height), per row or shared by all rows
             
-            if confidence > self.confidence_threshold:
-                box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                x1, y1, x2, y2 = box.astype(int)
-                
-                # Ensure coordinates are within frame
-                x1 = max(0, x1)
-                y1 = max(0, y1)
-                x2 = min(w, x2)
-                y2 = min(h, y2)
-                
-                faces.append(FaceDetection(
-                    x=x1,
-                    y=y1,
-                    width=x2 - x1,
-                    height=y2 - y1,
-                    confidence=float(confidence)
-                ))
+        Returns:
+            Integer (x1, y1, x2, y2) boxes clipped to the frame
+        """
+        boxes = (rows[:, 3:7] * np.tile(sizes, 2)).astype(int)
         
-        return faces
+        # Ensure coordinates are within frame
+        np.maximum(boxes[:, :2], 0, out=boxes[:, :2])
+        np.minimum(boxes[:, 2:], sizes, out=boxes[:, 2:])
+        return boxes
     
     def _detect_haar(self, frame: np.ndarray) -> List[FaceDetection]:
         """Fallback detection using Haar cascade."""
@@ -200,6 +429,9 @@ class FaceDetector:
     
     def get_largest_face(self, frame: np.ndarray) -> Optional[FaceDetection]:
         """Get the largest detected face (assumed to be the student)."""
+        if not self._use_haar_fallback and frame is not None and frame.size > 0:
+            return self._detect_dnn_largest(frame)
+        
         faces = self.detect(frame)
         if not faces:
             return None
@@ -239,11 +471,15 @@ class FaceDetector:
 
 # Global instance
 _detector: Optional[FaceDetector] = None
+_detector_lock = threading.Lock()
 
 
 def get_face_detector() -> FaceDetector:
     """Get global face detector instance."""
     global _detector
+    # Double-checked so callers only lock until the instance exists
     if _detector is None:
-        _detector = FaceDetector()
+        with _detector_lock:
+            if _detector is None:
+                _detector = FaceDetector()
     return _detector
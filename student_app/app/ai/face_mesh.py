@@ -0,0 +1,177 @@
+"""
+Student Exam Application - AI: Face Mesh
+
+Shared MediaPipe Face Mesh for the landmark-based detectors, so head
+pose and gaze tracking run one mesh inference per frame between them.
+"""
+
+import logging
+import threading
+from typing import Any, Hashable, Optional
+
+import numpy as np
+import mediapipe as mp
+
+logger = logging.getLogger(__name__)
+
+# Serialized NormalizedLandmark with only x, y and z set: field tag and
+# fixed32 payload for each (visibility and presence absent, i.e. 0)
+_LANDMARK_RECORD_SIZE = 17
+_LANDMARK_RECORD_HEADER = (0x0A, 15)        # landmark field, length
+_LANDMARK_FIELD_TAGS = ((2, 0x0D), (7, 0x15), (12, 0x1D))  # (offset, tag)
+_LANDMARK_FLOAT_COLUMNS = np.array([3, 4, 5, 6, 8, 9, 10, 11, 13, 14, 15, 16])
+
+
+def _landmark_array(landmarks: Any, width: int, height: int) -> np.ndarray:
+    """
+    Convert a landmark list to pixel coordinates.
+    
+    The common case (no visibility data) is decoded straight from the
+    serialized protobuf; anything else falls back to per-landmark access.
+    
+    Args:
+        landmarks: NormalizedLandmarkList of one face
+        width: Frame width in pixels
+        height: Frame height in pixels
+        
+    Returns:
+        (N, 3) float64 array of x and y in pixels, and visibility
+    """
+    count = len(landmarks.landmark)
+    data = np.frombuffer(landmarks.SerializeToString(), dtype=np.uint8)
+    
+    if data.size == count * _LANDMARK_RECORD_SIZE:
+        records = data.reshape(count, _LANDMARK_RECORD_SIZE)
+        tags_ok = (
+            (records[:, 0] == _LANDMARK_RECORD_HEADER[0]).all()
+            and (records[:, 1] == _LANDMARK_RECORD_HEADER[1]).all()
+            and all((records[:, offset] == tag).all() for offset, tag in _LANDMARK_FIELD_TAGS)
+        )
+        if tags_ok:
+            xyz = records[:, _LANDMARK_FLOAT_COLUMNS].copy().view("<f4")
+            points = np.zeros((count, 3), dtype=np.float64)
+            points[:, 0] = xyz[:, 0]
+            points[:, 1] = xyz[:, 1]
+            points[:, 0] *= width
+            points[:, 1] *= height
+            return points
+    
+    points = np.array(
+        [(lm.x, lm.y, lm.visibility) for lm in landmarks.landmark], dtype=np.float64
+    ).reshape(count, 3)
+    points[:, 0] *= width
+    points[:, 1] *= height
+    return points
+
+
+class FaceMeshProvider:
+    """
+    MediaPipe Face Mesh with a single-entry result cache.
+    
+    Callers that pass the same frame_id for the same frame get the result
+    of the first call instead of running the mesh again.
+    """
+    
+    def __init__(
+        self,
+        refine_landmarks: bool = True,
+        min_detection_confidence: float = 0.7,
+        min_tracking_confidence: float = 0.7
+    ):
+        """
+        Initialize face mesh provider.
+        
+        Args:
+            refine_landmarks: Run the attention model (iris, eye and lip
+                detail); required for gaze tracking
+            min_detection_confidence: Minimum confidence for face detection
+            min_tracking_confidence: Minimum confidence for tracking
+        """
+        self.face_mesh = mp.solutions.face_mesh.FaceMesh(
+            static_image_mode=False,
+            max_num_faces=1,
+            refine_landmarks=refine_landmarks,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+        
+        # The graph is not re-entrant; the lock also guards the cache
+        self._lock = threading.Lock()
+        self._cached_id: Optional[Hashable] = None
+        self._cached_results: Any = None
+        self._cached_points: Optional[np.ndarray] = None
+    
+    def process(self, rgb_frame: np.ndarray, frame_id: Optional[Hashable] = None) -> Any:
+        """
+        Run Face Mesh on a frame, reusing the result for a repeated frame_id.
+        
+        Args:
+            rgb_frame: RGB image
+            frame_id: Identifier of the frame (e.g. a capture counter), or
+                None to always run the mesh
+            
+        Returns:
+            MediaPipe Face Mesh results
+        """
+        with self._lock:
+            return self._process_locked(rgb_frame, frame_id)
+    
+    def process_points(
+        self,
+        rgb_frame: np.ndarray,
+        frame_id: Optional[Hashable] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Get the first face's landmarks in pixel coordinates.
+        
+        The array is built once per frame and shared by all callers with
+        the same frame_id; treat it as read-only.
+        
+        Args:
+            rgb_frame: RGB image
+            frame_id: As for process()
+            
+        Returns:
+            (N, 3) array of x, y (pixels) and visibility per landmark, or
+            None if no face was found
+        """
+        with self._lock:
+            results = self._process_locked(rgb_frame, frame_id)
+            if self._cached_points is None and results.multi_face_landmarks:
+                height, width = rgb_frame.shape[:2]
+                self._cached_points = _landmark_array(
+                    results.multi_face_landmarks[0], width, height
+                )
+            return self._cached_points
+    
+    def _process_locked(self, rgb_frame: np.ndarray, frame_id: Optional[Hashable]) -> Any:
+        """Run the mesh unless frame_id is cached (caller holds the lock)."""
+        if frame_id is None or frame_id != self._cached_id:
+            self._cached_results = self.face_mesh.process(rgb_frame)
+            self._cached_points = None
+            self._cached_id = frame_id
+        return self._cached_results
+    
+    def close(self):
+        """Release resources."""
+        with self._lock:
+            self._cached_id = None
+            self._cached_results = None
+            self._cached_points = None
+            self.face_mesh.close()
+
+
+# Global instance
+_provider: Optional[FaceMeshProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_face_mesh_provider() -> FaceMeshProvider:
+    """Get global face mesh provider instance."""
+    global _provider
+    # Double-checked so callers only lock until the instance exists
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = FaceMeshProvider()
+    return _provider
@@ -6,13 +6,13 @@ Compares live camera feed against stored reference photo.
 Implements threshold-based detection to reduce false positives.
 """
 
+import io
 import logging
+import math
 import threading
 import time
 import hashlib
-from collections import deque
-from datetime import datetime, timedelta
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
 from dataclasses import dataclass
 from pathlib import Path
 import numpy as np
@@ -57,6 +57,22 @@ class FaceVerifier:
     ALERT_AFTER_CONSECUTIVE = 5  # Consecutivemismatches before alert
     WINDOW_SECONDS = 30          # Time window for mismatch tracking
     MIN_CONFIDENCE = 0.7         # Minimum confidence to consider result
+    MISMATCH_HISTORY = 100       # Mismatch timestamps kept for the window check
+    
+    # Live frames are downscaled to this longest side before HOG detection
+    # and encoding, whose cost grows with pixel count
+    VERIFY_MAX_SIDE = 480
+    # HOG pyramid upsampling passes (0 finds faces down to ~80px at
+    # VERIFY_MAX_SIDE, ample for a student sitting at the webcam)
+    HOG_UPSAMPLE = 0
+    
+    # A face found in about the same place as the last encoded one reuses
+    # that result; at least every REENCODE_EVERY-th verify() re-encodes
+    REENCODE_EVERY = 3
+    REUSE_MIN_IOU = 0.6
+    
+    # Reference encodings remembered per photo (by SHA-256 of its bytes)
+    ENCODING_CACHE_SIZE = 8
     
     def __init__(
         self,
@@ -78,15 +94,29 @@ class FaceVerifier:
         
         # Reference encoding
         self._reference_encoding: Optional[np.ndarray] = None
+        self._reference_sq_norm = 0.0
         self._reference_loaded = False
         
-        # Mismatch tracking for false positive reduction
-        self._mismatch_times: deque = deque(maxlen=100)
+        # Mismatch tracking for false positive reduction. Monotonic
+        # timestamps live in a fixed ring so the window count is a single
+        # vectorized comparison.
+        self._mismatch_times = np.zeros(self.MISMATCH_HISTORY, dtype=np.float64)
+        self._mismatch_next = 0
+        self._mismatch_filled = 0
         self._consecutive_mismatches = 0
         self._lock = threading.Lock()
         
-        # Cache for encoding
-        self._encoding_cache: dict = {}
+        # Reference encodings keyed by SHA-256 hex digest of the photo
+        # bytes, oldest first. Kept in memory only: an encoding file on disk
+        # could be swapped by the examinee for someone else's face.
+        self._encoding_cache: Dict[str, np.ndarray] = {}
+        self._encoding_cache_lock = threading.Lock()
+        
+        # Last encoded live face (box in downscaled frame coordinates) and
+        # its result, reused while the face stays put
+        self._last_box: Optional[Tuple[int, int, int, int]] = None
+        self._last_result: Optional[VerificationResult] = None
+        self._reuse_count = 0
     
     def load_reference_from_url(self, photo_url: str) -> bool:
         """
@@ -105,6 +135,12 @@ class FaceVerifier:
             response = httpx.get(photo_url, timeout=30.0)
             response.raise_for_status()
             
+            # Same photo as an earlier load: skip decoding and encoding
+            digest = hashlib.sha256(response.content).hexdigest()
+            if self._use_cached_encoding(digest):
+                logger.info("Reference face encoding reused from cache")
+                return True
+            
             # Convert to numpy array
             image_array = np.frombuffer(response.content, dtype=np.uint8)
             image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
@@ -113,8 +149,9 @@ class FaceVerifier:
                 logger.error("Failed to decode reference image")
                 return False
             
-            # Convert BGR to RGB for face_recognition
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            # Convert BGR to RGB for face_recognition (in place; the decoded
+            # image is not used as BGR again)
+            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
             
             # Extract face encoding
             encodings = face_recognition.face_encodings(rgb_image)
@@ -123,8 +160,8 @@ class FaceVerifier:
                 logger.error("No face found in reference image")
                 return False
             
-            self._reference_encoding = encodings[0]
-            self._reference_loaded = True
+            self._cache_encoding(digest, encodings[0])
+            self._set_reference(encodings[0])
             
             logger.info("Reference face encoding loaded successfully")
             return True
@@ -144,15 +181,20 @@ class FaceVerifier:
             True if loaded successfully
         """
         try:
-            image = face_recognition.load_image_file(str(file_path))
+            data = Path(file_path).read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            if self._use_cached_encoding(digest):
+                return True
+            
+            image = face_recognition.load_image_file(io.BytesIO(data))
             encodings = face_recognition.face_encodings(image)
             
             if not encodings:
                 logger.error("No face found in reference image")
                 return False
             
-            self._reference_encoding = encodings[0]
-            self._reference_loaded = True
+            self._cache_encoding(digest, encodings[0])
+            self._set_reference(encodings[0])
             
             return True
             
@@ -160,12 +202,63 @@ class FaceVerifier:
             logger.error(f"Failed to load reference image: {e}")
             return False
     
-    def verify(self, frame: np.ndarray) -> VerificationResult:
+    def _use_cached_encoding(self, digest: str) -> bool:
+        """
+        Install a previously computed reference encoding, if there is one.
+        
+        Args:
+            digest: SHA-256 hex digest of the reference photo bytes
+            
+        Returns:
+            True if the cached encoding was installed
+        """
+        with self._encoding_cache_lock:
+            encoding = self._encoding_cache.get(digest)
+        
+        if encoding is None:
+            return False
+        
+        self._set_reference(encoding)
+        return True
+    
+    def _cache_encoding(self, digest: str, encoding: np.ndarray):
+        """
+        Remember a reference encoding for its photo.
+        
+        Args:
+            digest: SHA-256 hex digest of the reference photo bytes
+            encoding: Encoding computed from that photo
+        """
+        with self._encoding_cache_lock:
+            self._encoding_cache.pop(digest, None)
+            self._encoding_cache[digest] = encoding
+            while len(self._encoding_cache) > self.ENCODING_CACHE_SIZE:
+                del self._encoding_cache[next(iter(self._encoding_cache))]
+    
+    def _set_reference(self, encoding: np.ndarray):
+        """
+        Install a reference encoding.
+        
+        Args:
+            encoding: 128-dimension face encoding of the reference photo
+        """
+        self._reference_encoding = encoding
+        # Squared norm precomputed so each comparison is one dot product
+        self._reference_sq_norm = float(np.dot(encoding, encoding))
+        self._reference_loaded = True
+        self._last_result = None
+    
+    def verify(
+        self,
+        frame: np.ndarray,
+        rgb_frame: Optional[np.ndarray] = None
+    ) -> VerificationResult:
         """
         Verify face in frame against reference.
         
         Args:
             frame: BGR image from OpenCV
+            rgb_frame: The frame already converted to RGB, if the caller has it
             
         Returns:
             VerificationResult with match status and similarity
@@ -180,13 +273,26 @@ class FaceVerifier:
             )
         
         try:
-            # Convert BGR to RGB
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Downscale first; all conversions below run on the smaller image
+            image = frame if rgb_frame is None else rgb_frame
+            scale = self.VERIFY_MAX_SIDE / max(image.shape[:2])
+            if scale < 1.0:
+                image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
             
-            # Find faces in frame
-            face_locations = face_recognition.face_locations(rgb_frame, model="hog")
+            # Find faces in frame. HOG only needs luminance, so it scans a
+            # single-channel image.
+            gray = cv2.cvtColor(
+                image, cv2.COLOR_BGR2GRAY if rgb_frame is None else cv2.COLOR_RGB2GRAY
+            )
+            face_locations = face_recognition.face_locations(
+                gray,
+                number_of_times_to_upsample=self.HOG_UPSAMPLE,
+                model="hog"
+            )
             
             if not face_locations:
+                # Whoever appears next is encoded afresh
+                self._last_result = None
                 return VerificationResult(
                     is_match=False, # Security: Fail closed if no face in frame
                     similarity=0.0,
@@ -195,8 +301,28 @@ class FaceVerifier:
                     message="No face detected in frame"
                 )
             
-            # Get encoding for the largest face
-            face_encodings = face_recognition.face_encodings(rgb_frame, face_locations)
+            # The dlib ResNet encoding dominates the cost. Skip it while the
+            # face has not moved since the last one, up to REENCODE_EVERY.
+            # A reused result still counts towards the mismatch alerts.
+            box = face_locations[0]
+            if (
+                self._last_result is not None
+                and self._reuse_count < self.REENCODE_EVERY - 1
+                and self._box_iou(box, self._last_box) >= self.REUSE_MIN_IOU
+            ):
+                self._reuse_count += 1
+                self._last_box = box
+                self._track_result(self._last_result.is_match)
+                return self._last_result
+            
+            # The encoder needs colour. A resized copy is ours to swap
+            # channels in place; the caller's frame needs a new buffer.
+            rgb = image
+            if rgb_frame is None:
+                rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image if scale < 1.0 else None)
+            
+            # Get encoding for the first face only; any others are unused
+            face_encodings = face_recognition.face_encodings(rgb, [box])
             
             if not face_encodings:
                 return VerificationResult(
@@ -208,11 +334,15 @@ class FaceVerifier:
                 )
             
             # Compare with reference
+            # ||ref - live|| expanded as ||ref||^2 + ||live||^2 - 2<ref, live>
+            # (same value as face_recognition.face_distance, no temporaries)
             live_encoding = face_encodings[0]
-            distance = face_recognition.face_distance(
-                [self._reference_encoding], 
-                live_encoding
-            )[0]
+            sq_distance = (
+                self._reference_sq_norm
+                + float(np.dot(live_encoding, live_encoding))
+                - 2.0 * float(np.dot(self._reference_encoding, live_encoding))
+            )
+            distance = math.sqrt(max(0.0, sq_distance))
             
             # Convert distance to similarity (0-1, higher is better)
             similarity = 1.0 - min(distance, 1.0)
@@ -224,13 +354,17 @@ class FaceVerifier:
             # Track result (Only if a face was actually detected)
             self._track_result(is_match)
             
-            return VerificationResult(
+            result = VerificationResult(
                 is_match=is_match,
                 similarity=similarity,
                 distance=float(distance),
                 confidence=confidence,
                 message="" if is_match else "Face does not match reference"
             )
+            self._last_box = box
+            self._last_result = result
+            self._reuse_count = 0
+            return result
             
         except Exception as e:
             logger.error(f"Face verification error: {e}")
@@ -242,6 +376,31 @@ class FaceVerifier:
                 message=f"Verification system error: {str(e)}"
             )
     
+    @staticmethod
+    def _box_iou(
+        a: Tuple[int, int, int, int],
+        b: Tuple[int, int, int, int]
+    ) -> float:
+        """
+        Intersection over union of two face boxes.
+        
+        Args:
+            a: (top, right, bottom, left) box, as from face_locations
+            b: Second box in the same form
+            
+        Returns:
+            Overlap ratio from 0.0 (disjoint) to 1.0 (identical)
+        """
+        inter_h = min(a[2], b[2]) - max(a[0], b[0])
+        inter_w = min(a[1], b[1]) - max(a[3], b[3])
+        if inter_h <= 0 or inter_w <= 0:
+            return 0.0
+        
+        inter = inter_h * inter_w
+        area_a = (a[2] - a[0]) * (a[1] - a[3])
+        area_b = (b[2] - b[0]) * (b[1] - b[3])
+        return inter / (area_a + area_b - inter)
+    
     def _track_result(self, is_match: Optional[bool]):
         """
         Track verification results for false positive reduction.
@@ -250,8 +409,6 @@ class FaceVerifier:
             is_match: Match result, or None if no face detected in frame.
         """
         with self._lock:
-            now = datetime.now()
-            
             # Use None to indicate face was absent - we don't increment/reset
             if is_match is None:
                 return
@@ -262,7 +419,14 @@ class FaceVerifier:
             else:
                 # Track mismatch ONLY if face was present but didn't match
                 self._consecutive_mismatches += 1
-                self._mismatch_times.append(now)
+                self._mismatch_times[self._mismatch_next] = time.monotonic()
+                self._mismatch_next = (self._mismatch_next + 1) % self.MISMATCH_HISTORY
+                self._mismatch_filled = min(self._mismatch_filled + 1, self.MISMATCH_HISTORY)
+    
+    def _count_recent_mismatches(self) -> int:
+        """Count mismatches inside the tracking window (caller holds the lock)."""
+        cutoff = time.monotonic() - self.WINDOW_SECONDS
+        return int(np.count_nonzero(self._mismatch_times[:self._mismatch_filled] >= cutoff))
     
     def should_alert(self) -> Tuple[bool, str]:
         """
@@ -279,8 +443,7 @@ class FaceVerifier:
                 return True, f"{self._consecutive_mismatches} consecutive face mismatches"
             
             # Check mismatches in time window
-            window_cutoff = datetime.now() - timedelta(seconds=self.WINDOW_SECONDS)
-            recent_mismatches = sum(1 for t in self._mismatch_times if t >= window_cutoff)
+            recent_mismatches = self._count_recent_mismatches()
             
             # Alert if too many mismatches in window (more than 60% of checks)
             if recent_mismatches >= 10:
@@ -291,14 +454,14 @@ class FaceVerifier:
     def reset_tracking(self):
         """Reset mismatch tracking."""
         with self._lock:
-            self._mismatch_times.clear()
+            self._mismatch_next = 0
+            self._mismatch_filled = 0
             self._consecutive_mismatches = 0
     
     def get_stats(self) -> dict:
         """Get verification statistics."""
         with self._lock:
-            window_cutoff = datetime.now() - timedelta(seconds=self.WINDOW_SECONDS)
-            recent_mismatches = sum(1 for t in self._mismatch_times if t >= window_cutoff)
+            recent_mismatches = self._count_recent_mismatches()
             
             return {
                 "reference_loaded": self._reference_loaded,
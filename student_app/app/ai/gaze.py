@@ -9,7 +9,8 @@ import numpy as np
 import logging
 from typing import Optional, Tuple, List
 from dataclasses import dataclass
-import mediapipe as mp
+from student_app.app.ai.face_mesh import FaceMeshProvider, get_face_mesh_provider
+from student_app.app.utils.image import bgr_to_rgb
 
 logger = logging.getLogger(__name__)
 
@@ -60,10 +61,24 @@ class GazeTracker:
     RIGHT_EYE_BOTTOM = 374
     RIGHT_IRIS_CENTER = 473  # Refined landmark
     
+    # (outer, inner, top, bottom, iris) per eye, left then right; the
+    # layout _compute_eye_gaze expects
+    GAZE_INDICES = (
+        LEFT_EYE_OUTER, LEFT_EYE_INNER, LEFT_EYE_TOP, LEFT_EYE_BOTTOM, LEFT_IRIS_CENTER,
+        RIGHT_EYE_OUTER, RIGHT_EYE_INNER, RIGHT_EYE_TOP, RIGHT_EYE_BOTTOM, RIGHT_IRIS_CENTER,
+    )
+    
+    # (top, bottom, outer, inner) per eye, left then right
+    EYE_CLOSURE_INDICES = (
+        LEFT_EYE_TOP, LEFT_EYE_BOTTOM, LEFT_EYE_OUTER, LEFT_EYE_INNER,
+        RIGHT_EYE_TOP, RIGHT_EYE_BOTTOM, RIGHT_EYE_OUTER, RIGHT_EYE_INNER,
+    )
+    
     def __init__(
         self,
         min_detection_confidence: float = 0.7,
-        min_tracking_confidence: float = 0.7
+        min_tracking_confidence: float = 0.7,
+        face_mesh: Optional[FaceMeshProvider] = None
     ):
         """
         Initialize gaze tracker.
@@ -71,22 +86,36 @@ class GazeTracker:
         Args:
             min_detection_confidence: Minimum confidence for detection
             min_tracking_confidence: Minimum confidence for tracking
+            face_mesh: Shared face mesh with refined landmarks (the
+                confidences then come from it); a private one is created
+                if omitted
         """
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,  # Enable iris landmarks
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence
-        )
+        self._owns_face_mesh = face_mesh is None
+        if face_mesh is None:
+            face_mesh = FaceMeshProvider(
+                refine_landmarks=True,  # Enable iris landmarks
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence
+            )
+        self.face_mesh = face_mesh
+        
+        # Reused RGB conversion target for Face Mesh input
+        self._rgb_buf: Optional[np.ndarray] = None
     
-    def track(self, frame: np.ndarray) -> Optional[GazeDirection]:
+    def track(
+        self,
+        frame: np.ndarray,
+        rgb_frame: Optional[np.ndarray] = None,
+        frame_id: Optional[int] = None
+    ) -> Optional[GazeDirection]:
         """
         Track gaze direction in a frame.
         
         Args:
             frame: BGR image from OpenCV
+            rgb_frame: The frame already converted to RGB, if the caller has it
+            frame_id: Frame identifier for sharing the mesh result with other
+                detectors (see FaceMeshProvider.process)
             
         Returns:
             GazeDirection object or None if eyes not detected
@@ -94,30 +123,21 @@ class GazeTracker:
         if frame is None or frame.size == 0:
             return None
         
-        h, w = frame.shape[:2]
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb)
+        if rgb_frame is None:
+            rgb_frame = self._rgb_buf = bgr_to_rgb(frame, self._rgb_buf)
+        points = self.face_mesh.process_points(rgb_frame, frame_id)
         
-        if not results.multi_face_landmarks:
+        # Iris centers only exist in the refined (478-point) mesh
+        if points is None or len(points) <= self.RIGHT_IRIS_CENTER:
             return None
         
-        landmarks = results.multi_face_landmarks[0]
-        
-        # Get left eye gaze
-        left_gaze = self._compute_eye_gaze(
-            landmarks, w, h,
-            self.LEFT_EYE_OUTER, self.LEFT_EYE_INNER,
-            self.LEFT_EYE_TOP, self.LEFT_EYE_BOTTOM,
-            self.LEFT_IRIS_CENTER
-        )
+        # Pixel coordinates of both eyes' landmarks, gathered in one pass
+        # and handed over as Python floats for the scalar math below
+        left_eye, right_eye = points[self.GAZE_INDICES, :2].reshape(2, 5, 2).tolist()
         
-        # Get right eye gaze
-        right_gaze = self._compute_eye_gaze(
-            landmarks, w, h,
-            self.RIGHT_EYE_OUTER, self.RIGHT_EYE_INNER,
-            self.RIGHT_EYE_TOP, self.RIGHT_EYE_BOTTOM,
-            self.RIGHT_IRIS_CENTER
-        )
+        # Get left and right eye gaze
+        left_gaze = self._compute_eye_gaze(left_eye)
+        right_gaze = self._compute_eye_gaze(right_eye)
         
         if left_gaze is None and right_gaze is None:
             return None
@@ -138,69 +158,60 @@ class GazeTracker:
             confidence=confidence
         )
     
-    def _compute_eye_gaze(
-        self,
-        landmarks,
-        frame_width: int,
-        frame_height: int,
-        outer_idx: int,
-        inner_idx: int,
-        top_idx: int,
-        bottom_idx: int,
-        iris_idx: int
-    ) -> Optional[Tuple[float, float, float]]:
-        """Compute gaze for a single eye."""
-        try:
-            # Get landmark positions
-            outer = landmarks.landmark[outer_idx]
-            inner = landmarks.landmark[inner_idx]
-            top = landmarks.landmark[top_idx]
-            bottom = landmarks.landmark[bottom_idx]
-            iris = landmarks.landmark[iris_idx]
-            
-            # Convert to pixel coordinates
-            outer_pt = np.array([outer.x * frame_width, outer.y * frame_height])
-            inner_pt = np.array([inner.x * frame_width, inner.y * frame_height])
-            top_pt = np.array([top.x * frame_width, top.y * frame_height])
-            bottom_pt = np.array([bottom.x * frame_width, bottom.y * frame_height])
-            iris_pt = np.array([iris.x * frame_width, iris.y * frame_height])
-            
-            # Eye center
-            eye_center_x = (outer_pt[0] + inner_pt[0]) / 2
-            eye_center_y = (top_pt[1] + bottom_pt[1]) / 2
-            
-            # Eye dimensions
-            eye_width = abs(inner_pt[0] - outer_pt[0])
-            eye_height = abs(bottom_pt[1] - top_pt[1])
-            
-            if eye_width < 5 or eye_height < 3:  # Too small to analyze
-                return None
-            
-            # Iris offset from center, normalized to -1 to 1
-            horizontal = (iris_pt[0] - eye_center_x) / (eye_width / 2)
-            vertical = (iris_pt[1] - eye_center_y) / (eye_height / 2)
-            
-            # Clamp to reasonable range
-            horizontal = np.clip(horizontal, -1.5, 1.5)
-            vertical = np.clip(vertical, -1.5, 1.5)
-            
-            # Confidence based on eye openness
-            openness = eye_height / eye_width
-            confidence = min(1.0, openness / 0.3)  # Eyes with aspect > 0.3 get full confidence
-            
-            return (horizontal, vertical, confidence)
+    def _compute_eye_gaze(self, eye: List[List[float]]) -> Optional[Tuple[float, float, float]]:
+        """
+        Compute gaze for a single eye.
+        
+        Args:
+            eye: Five [x, y] pixel coordinates: outer corner, inner corner,
+                top, bottom and iris center
             
-        except (IndexError, AttributeError) as e:
-            logger.debug(f"Eye gaze computation error: {e}")
+        Returns:
+            (horizontal, vertical, confidence), or None if the eye is too small
+        """
+        (outer_x, _), (inner_x, _), (_, top_y), (_, bottom_y), (iris_x, iris_y) = eye
+        
+        # Eye center
+        eye_center_x = (outer_x + inner_x) / 2
+        eye_center_y = (top_y + bottom_y) / 2
+        
+        # Eye dimensions
+        eye_width = abs(inner_x - outer_x)
+        eye_height = abs(bottom_y - top_y)
+        
+        if eye_width < 5 or eye_height < 3:  # Too small to analyze
             return None
+        
+        # Iris offset from center, normalized to -1 to 1
+        horizontal = (iris_x - eye_center_x) / (eye_width / 2)
+        vertical = (iris_y - eye_center_y) / (eye_height / 2)
+        
+        # Clamp to reasonable range
+        horizontal = max(-1.5, min(1.5, horizontal))
+        vertical = max(-1.5, min(1.5, vertical))
+        
+        # Confidence based on eye openness
+        openness = eye_height / eye_width
+        confidence = min(1.0, openness / 0.3)  # Eyes with aspect > 0.3 get full confidence
+        
+        return (horizontal, vertical, confidence)
     
-    def is_eyes_closed(self, frame: np.ndarray, threshold: float = 0.15) -> bool:
+    def is_eyes_closed(
+        self,
+        frame: np.ndarray,
+        threshold: float = 0.15,
+        rgb_frame: Optional[np.ndarray] = None,
+        frame_id: Optional[int] = None
+    ) -> bool:
         """
         Detect if eyes are closed.
         
         Args:
             frame: BGR image
             threshold: Aspect ratio threshold (lower = more closed)
+            rgb_frame: The frame already converted to RGB, if the caller has it
+            frame_id: Frame identifier for sharing the mesh result with other
+                detectors (see FaceMeshProvider.process)
             
         Returns:
             True if eyes appear closed
@@ -208,36 +219,22 @@ class GazeTracker:
         if frame is None or frame.size == 0:
             return False
         
-        h, w = frame.shape[:2]
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb)
+        if rgb_frame is None:
+            rgb_frame = self._rgb_buf = bgr_to_rgb(frame, self._rgb_buf)
+        points = self.face_mesh.process_points(rgb_frame, frame_id)
         
-        if not results.multi_face_landmarks:
+        if points is None:
             return False
         
-        landmarks = results.multi_face_landmarks[0]
+        # Aspect ratios of both eyes in one vectorized pass
+        eyes = points[self.EYE_CLOSURE_INDICES, :2].reshape(2, 4, 2)
         
-        # Check both eyes
-        for eye_top, eye_bottom, eye_outer, eye_inner in [
-            (self.LEFT_EYE_TOP, self.LEFT_EYE_BOTTOM, 
-             self.LEFT_EYE_OUTER, self.LEFT_EYE_INNER),
-            (self.RIGHT_EYE_TOP, self.RIGHT_EYE_BOTTOM,
-             self.RIGHT_EYE_OUTER, self.RIGHT_EYE_INNER)
-        ]:
-            top = landmarks.landmark[eye_top]
-            bottom = landmarks.landmark[eye_bottom]
-            outer = landmarks.landmark[eye_outer]
-            inner = landmarks.landmark[eye_inner]
-            
-            eye_height = abs(bottom.y - top.y) * h
-            eye_width = abs(inner.x - outer.x) * w
-            
-            if eye_width > 0:
-                aspect_ratio = eye_height / eye_width
-                if aspect_ratio < threshold:
-                    return True
+        eye_heights = np.abs(eyes[:, 1, 1] - eyes[:, 0, 1])
+        eye_widths = np.abs(eyes[:, 3, 0] - eyes[:, 2, 0])
         
-        return False
+        # height / width < threshold, without dividing by a zero width
+        closed = (eye_widths > 0) & (eye_heights < threshold * eye_widths)
+        return bool(closed.any())
     
     def draw_gaze(
         self,
@@ -272,7 +269,8 @@ class GazeTracker:
     
     def close(self):
         """Release resources."""
-        self.face_mesh.close()
+        if self._owns_face_mesh:
+            self.face_mesh.close()
 
 
 # Global instance
@@ -283,5 +281,5 @@ def get_gaze_tracker() -> GazeTracker:
     """Get global gaze tracker instance."""
     global _tracker
     if _tracker is None:
-        _tracker = GazeTracker()
+        _tracker = GazeTracker(face_mesh=get_face_mesh_provider())
     return _tracker
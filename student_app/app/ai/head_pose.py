@@ -5,14 +5,20 @@ Estimates head orientation (yaw, pitch, roll) using MediaPipe Face Mesh.
 """
 
 import cv2
+import math
 import numpy as np
 import logging
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
 from dataclasses import dataclass
-import mediapipe as mp
+from student_app.app.ai.face_mesh import FaceMeshProvider, get_face_mesh_provider
+from student_app.app.utils.image import bgr_to_rgb
 
 logger = logging.getLogger(__name__)
 
+# Non-iterative global PnP solver (OpenCV 4.5.3+) for frames without a
+# previous pose to start from; older builds fall back to Levenberg-Marquardt
+PNP_SOLVER_FLAG = getattr(cv2, "SOLVEPNP_SQPNP", cv2.SOLVEPNP_ITERATIVE)
+
 
 @dataclass
 class HeadPose:
@@ -62,7 +68,8 @@ class HeadPoseEstimator:
     def __init__(
         self,
         min_detection_confidence: float = 0.7,
-        min_tracking_confidence: float = 0.7
+        min_tracking_confidence: float = 0.7,
+        face_mesh: Optional[FaceMeshProvider] = None
     ):
         """
         Initialize head pose estimator.
@@ -70,45 +77,70 @@ class HeadPoseEstimator:
         Args:
             min_detection_confidence: Minimum confidence for face detection
             min_tracking_confidence: Minimum confidence for tracking
+            face_mesh: Shared face mesh (the confidences then come from it);
+                a private one is created if omitted
         """
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            static_image_mode=False,
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence
-        )
+        self._owns_face_mesh = face_mesh is None
+        if face_mesh is None:
+            # None of LANDMARK_INDICES are iris points, so a private mesh
+            # skips the attention refinement model (iris + eye/lip detail)
+            face_mesh = FaceMeshProvider(
+                refine_landmarks=False,
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence
+            )
+        self.face_mesh = face_mesh
         
-        # Camera matrix will be computed based on frame size
-        self._camera_matrix = None
+        # Camera matrices per frame size, built on first use
+        self._camera_matrices: Dict[Tuple[int, int], np.ndarray] = {}
         self._dist_coeffs = np.zeros((4, 1))
-        self._frame_size = None
+        
+        # Reused RGB conversion target for Face Mesh input
+        self._rgb_buf: Optional[np.ndarray] = None
+        
+        # Reused per-frame buffer for the 2D points fed to solvePnP
+        self._image_points = np.zeros((len(self.LANDMARK_INDICES), 2), dtype=np.float64)
+        
+        # Last solved pose and its frame size. Head pose changes little
+        # between frames, so it seeds the next solve; cleared whenever a
+        # frame yields no pose.
+        self._rvec: Optional[np.ndarray] = None
+        self._tvec: Optional[np.ndarray] = None
+        self._pose_frame_size: Optional[Tuple[int, int]] = None
     
     def _get_camera_matrix(self, frame_size: Tuple[int, int]) -> np.ndarray:
         """Get or compute camera matrix for frame size."""
-        if self._frame_size != frame_size:
-            self._frame_size = frame_size
+        camera_matrix = self._camera_matrices.get(frame_size)
+        if camera_matrix is None:
             h, w = frame_size
             
             # Approximate camera matrix (assuming no lens distortion)
             focal_length = w
             center = (w / 2, h / 2)
             
-            self._camera_matrix = np.array([
+            camera_matrix = np.array([
                 [focal_length, 0, center[0]],
                 [0, focal_length, center[1]],
                 [0, 0, 1]
             ], dtype=np.float64)
+            self._camera_matrices[frame_size] = camera_matrix
         
-        return self._camera_matrix
+        return camera_matrix
     
-    def estimate(self, frame: np.ndarray) -> Optional[HeadPose]:
+    def estimate(
+        self,
+        frame: np.ndarray,
+        rgb_frame: Optional[np.ndarray] = None,
+        frame_id: Optional[int] = None
+    ) -> Optional[HeadPose]:
         """
         Estimate head pose from a frame.
         
         Args:
             frame: BGR image from OpenCV
+            rgb_frame: The frame already converted to RGB, if the caller has it
+            frame_id: Frame identifier for sharing the mesh result with other
+                detectors (see FaceMeshProvider.process)
             
         Returns:
             HeadPose object or None if no face detected
@@ -119,82 +151,94 @@ class HeadPoseEstimator:
         h, w = frame.shape[:2]
         camera_matrix = self._get_camera_matrix((h, w))
         
-        # Convert to RGB for MediaPipe
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb)
+        # Convert to RGB for MediaPipe (into the reused, read-only buffer)
+        # unless the caller already did
+        if rgb_frame is None:
+            rgb_frame = self._rgb_buf = bgr_to_rgb(frame, self._rgb_buf)
+        points = self.face_mesh.process_points(rgb_frame, frame_id)
         
-        if not results.multi_face_landmarks:
+        if points is None:
+            self._rvec = None
             return None
         
-        # Get landmarks for first face
-        landmarks = results.multi_face_landmarks[0]
-        
-        # Extract 2D image points
-        image_points = np.array([
-            (landmarks.landmark[idx].x * w, landmarks.landmark[idx].y * h)
-            for idx in self.LANDMARK_INDICES
-        ], dtype=np.float64)
-        
-        # Solve PnP for rotation
-        success, rotation_vector, translation_vector = cv2.solvePnP(
-            self.MODEL_POINTS,
-            image_points,
-            camera_matrix,
-            self._dist_coeffs,
-            flags=cv2.SOLVEPNP_ITERATIVE
-        )
+        # 2D image points and landmark visibility of the model points
+        selected = points[self.LANDMARK_INDICES]
+        image_points = self._image_points
+        image_points[:] = selected[:, :2]
+        
+        # Solve PnP for rotation: refine the previous pose with a few
+        # Levenberg-Marquardt steps, or solve from scratch without one
+        if self._rvec is not None and self._pose_frame_size == (h, w):
+            success, rotation_vector, translation_vector = cv2.solvePnP(
+                self.MODEL_POINTS,
+                image_points,
+                camera_matrix,
+                self._dist_coeffs,
+                self._rvec,
+                self._tvec,
+                useExtrinsicGuess=True,
+                flags=cv2.SOLVEPNP_ITERATIVE
+            )
+        else:
+            success, rotation_vector, translation_vector = cv2.solvePnP(
+                self.MODEL_POINTS,
+                image_points,
+                camera_matrix,
+                self._dist_coeffs,
+                flags=PNP_SOLVER_FLAG
+            )
         
         if not success:
+            self._rvec = None
             return None
         
-        # Convert rotation vector to Euler angles
-        rotation_matrix, _ = cv2.Rodrigues(rotation_vector)
-        pose_matrix = cv2.hconcat([rotation_matrix, translation_vector])
+        self._rvec, self._tvec = rotation_vector, translation_vector
+        self._pose_frame_size = (h, w)
         
-        # Decompose projection matrix
-        _, _, _, _, _, _, euler_angles = cv2.decomposeProjectionMatrix(
-            cv2.vconcat([pose_matrix, np.array([[0, 0, 0, 1]])])
-        )
+        # Convert rotation vector to Euler angles, read straight off the
+        # rotation matrix R = Rz(roll) @ Ry(yaw) @ Rx(pitch). These are the
+        # angles decomposeProjectionMatrix's RQ decomposition returns for
+        # [R | t], without building and factorizing the projection matrix.
+        rotation_matrix, _ = cv2.Rodrigues(rotation_vector)
+        (r00, _, _), (r10, _, _), (r20, r21, r22) = rotation_matrix.tolist()
         
-        yaw = euler_angles[1, 0]
-        pitch = euler_angles[0, 0]
-        roll = euler_angles[2, 0]
+        yaw = math.degrees(math.atan2(-r20, math.hypot(r00, r10)))
+        pitch = math.degrees(math.atan2(r21, r22))
+        roll = math.degrees(math.atan2(r10, r00))
         
         # Calculate confidence based on landmark visibility
-        visibility = np.mean([
-            landmarks.landmark[idx].visibility 
-            for idx in self.LANDMARK_INDICES
-            if hasattr(landmarks.landmark[idx], 'visibility')
-        ]) if hasattr(landmarks.landmark[0], 'visibility') else 0.9
+        visibility = selected[:, 2].mean()
         
         return HeadPose(
-            yaw=float(yaw),
-            pitch=float(pitch),
-            roll=float(roll),
+            yaw=yaw,
+            pitch=pitch,
+            roll=roll,
             confidence=float(visibility)
         )
     
-    def get_landmarks(self, frame: np.ndarray) -> Optional[List[Tuple[int, int]]]:
+    def get_landmarks(
+        self,
+        frame: np.ndarray,
+        rgb_frame: Optional[np.ndarray] = None,
+        frame_id: Optional[int] = None
+    ) -> Optional[List[Tuple[int, int]]]:
         """
         Get all face landmarks for a frame.
         
         Returns list of (x, y) coordinates for all 468 landmarks.
+        rgb_frame and frame_id are as for estimate().
         """
         if frame is None or frame.size == 0:
             return None
         
-        h, w = frame.shape[:2]
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb)
+        if rgb_frame is None:
+            rgb_frame = self._rgb_buf = bgr_to_rgb(frame, self._rgb_buf)
+        points = self.face_mesh.process_points(rgb_frame, frame_id)
         
-        if not results.multi_face_landmarks:
+        if points is None:
             return None
         
-        landmarks = results.multi_face_landmarks[0]
-        return [
-            (int(lm.x * w), int(lm.y * h))
-            for lm in landmarks.landmark
-        ]
+        return list(map(tuple, points[:, :2].astype(int).tolist()))
     
     def draw_pose(
         self,
@@ -229,7 +273,8 @@ class HeadPoseEstimator:
     
     def close(self):
         """Release resources."""
-        self.face_mesh.close()
+        if self._owns_face_mesh:
+            self.face_mesh.close()
 
 
 # Global instance
@@ -240,5 +285,5 @@ def get_head_pose_estimator() -> HeadPoseEstimator:
     """Get global head pose estimator instance."""
     global _estimator
     if _estimator is None:
-        _estimator = HeadPoseEstimator()
+        _estimator = HeadPoseEstimator(face_mesh=get_face_mesh_provider())
     return _estimator
@@ -249,11 +249,9 @@ class Authenticator:
             Tuple of (drift_seconds, is_acceptable)
         """
         try:
-            import httpx
-            
-            # Get server time from Supabase
+            # Get server time from Supabase (reuses the client's connection)
             url = f"{self.client.base_url}/rest/v1/"
-            response = httpx.head(url, headers=self.client._default_headers())
+            response = self.client._client.head(url)
             
             server_time_str = response.headers.get("Date")
             if server_time_str:
@@ -7,7 +7,6 @@ Enables extraction of evidence clips from past events.
 
 import logging
 import threading
-import time
 from collections import deque
 from datetime import datetime, timedelta
 from typing import Optional, Tuple, List, Generator
@@ -23,9 +22,17 @@ logger = logging.getLogger(__name__)
 @dataclass
 class BufferedFrame:
     """A frame stored in the buffer."""
-    frame: np.ndarray
+    data: np.ndarray  # JPEG bytes if encoded, else the BGR frame
     timestamp: datetime
     frame_number: int
+    encoded: bool = False
+    
+    @property
+    def frame(self) -> np.ndarray:
+        """The BGR frame (decoded on access if stored as JPEG)."""
+        if self.encoded:
+            return cv2.imdecode(self.data, cv2.IMREAD_COLOR)
+        return self.data
 
 
 class CircularBuffer:
@@ -34,12 +41,16 @@ class CircularBuffer:
     
     Maintains a rolling window of recent frames for evidence extraction.
     Default retention: 10 minutes at 15 FPS = 9000 frames.
+    
+    Frames are JPEG-compressed by default: a raw 640x480 frame is ~900KB,
+    so a full buffer would otherwise need several GB of RAM.
     """
     
     def __init__(
         self,
         retention_minutes: Optional[int] = None,
-        fps: int = 15
+        fps: int = 15,
+        jpeg_quality: Optional[int] = None
     ):
         """
         Initialize circular buffer.
@@ -47,9 +58,15 @@ class CircularBuffer:
         Args:
             retention_minutes: Minutes of video to retain
             fps: Expected frames per second
+            jpeg_quality: JPEG quality for stored frames (0 = store raw)
         """
         config = get_config()
         retention_minutes = retention_minutes or config.thresholds.BUFFER_MINUTES
+        if jpeg_quality is None:
+            jpeg_quality = config.thresholds.BUFFER_JPEG_QUALITY
+        
+        self.jpeg_quality = jpeg_quality
+        self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
         
         self.retention_seconds = retention_minutes * 60
         self.fps = fps
@@ -77,13 +94,23 @@ class CircularBuffer:
         
         timestamp = timestamp or datetime.now()
         
+        # Encode (or copy) outside the lock so readers extracting a clip are
+        # not held up by the per-frame JPEG encode; only the counter and the
+        # append need to be serialized
+        encoded = False
+        if self.jpeg_quality:
+            encoded, data = cv2.imencode(".jpg", frame, self._encode_params)
+        if not encoded:
+            data = frame.copy()  # Copy to prevent external modification
+        
         with self._lock:
             self._frame_counter += 1
             
             buffered = BufferedFrame(
-                frame=frame.copy(),  # Copy to prevent external modification
+                data=data,
                 timestamp=timestamp,
-                frame_number=self._frame_counter
+                frame_number=self._frame_counter,
+                encoded=encoded
             )
             
             self._frames.append(buffered)
@@ -186,13 +213,9 @@ class CircularBuffer:
             newest = self._frames[-1].timestamp
             duration = (newest - oldest).total_seconds()
             
-            # Estimate memory usage
-            if self._frames:
-                frame_size = self._frames[0].frame.nbytes
-                memory_bytes = len(self._frames) * frame_size
-                memory_mb = memory_bytes / (1024 * 1024)
-            else:
-                memory_mb = 0
+            # Memory usage (encoded frames vary in size, so sum them)
+            memory_bytes = sum(f.data.nbytes for f in self._frames)
+            memory_mb = memory_bytes / (1024 * 1024)
             
             return {
                 "frame_count": len(self._frames),
@@ -225,10 +248,12 @@ class BufferManager:
         self.buffer = CircularBuffer()
         self._running = False
         self._stats_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
     
     def start(self):
         """Start buffer management."""
         self._running = True
+        self._stop_event.clear()
         self._stats_thread = threading.Thread(target=self._stats_loop, daemon=True)
         self._stats_thread.start()
         logger.info("Buffer manager started")
@@ -236,14 +261,16 @@ class BufferManager:
     def stop(self):
         """Stop buffer management."""
         self._running = False
+        self._stop_event.set()
         if self._stats_thread:
             self._stats_thread.join(timeout=2.0)
             self._stats_thread = None
     
     def _stats_loop(self):
         """Periodic statistics logging."""
-        while self._running:
-            time.sleep(60)  # Log every minute
+        # Event.wait() times out on the monotonic clock and returns as soon
+        # as stop() is called, instead of sleeping out the full minute
+        while not self._stop_event.wait(60):  # Log every minute
             if self._running:
                 info = self.buffer.get_buffer_info()
                 logger.debug(
@@ -43,6 +43,7 @@ class ThresholdConfig:
     # Evidence
     CLIP_UPLOAD_MIN_CONFIDENCE: float = 0.6
     BUFFER_MINUTES: int = 10
+    BUFFER_JPEG_QUALITY: int = 90  # JPEG-compress buffered frames (0 = raw)
     CLIP_PADDING_SECONDS: float = 5.0
     
     # UI
@@ -202,6 +203,7 @@ class ConfigManager:
             "T_GAZE_SECONDS": "T_GAZE_SECONDS",
             "clip_upload_min_confidence": "CLIP_UPLOAD_MIN_CONFIDENCE",
             "buffer_minutes": "BUFFER_MINUTES",
+            "buffer_jpeg_quality": "BUFFER_JPEG_QUALITY",
             "clip_padding_seconds": "CLIP_PADDING_SECONDS",
             "autosave_interval_seconds": "AUTOSAVE_INTERVAL_SECONDS",
         }
@@ -221,6 +223,7 @@ class ConfigManager:
                 "T_GAZE_SECONDS": self.config.thresholds.T_GAZE_SECONDS,
                 "clip_upload_min_confidence": self.config.thresholds.CLIP_UPLOAD_MIN_CONFIDENCE,
                 "buffer_minutes": self.config.thresholds.BUFFER_MINUTES,
+                "buffer_jpeg_quality": self.config.thresholds.BUFFER_JPEG_QUALITY,
                 "clip_padding_seconds": self.config.thresholds.CLIP_PADDING_SECONDS,
                 "autosave_interval_seconds": self.config.thresholds.AUTOSAVE_INTERVAL_SECONDS,
             },
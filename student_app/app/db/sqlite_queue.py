@@ -55,9 +55,21 @@ class SQLiteQueue:
         )
     """
     
-    CREATE_INDEX = """
-        CREATE INDEX IF NOT EXISTS idx_queue_status ON upload_queue(status)
-    """
+    # (status, created_at) covers the per-status counts and returns
+    # dequeue/cleanup candidates already in created_at order; it supersedes
+    # the old single-column status index
+    CREATE_INDEXES = (
+        "CREATE INDEX IF NOT EXISTS idx_queue_status_created ON upload_queue(status, created_at)",
+        "DROP INDEX IF EXISTS idx_queue_status",
+    )
+    
+    # Applied once per connection
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+    )
     
     def __init__(self, db_path: Optional[Path] = None):
         """
@@ -70,24 +82,43 @@ class SQLiteQueue:
         self.db_path = db_path or config.queue_db
         
         self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
         self._init_db()
     
     def _init_db(self):
         """Initialize database schema."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with self._get_connection() as conn:
-            conn.execute(self.CREATE_TABLE)
-            conn.execute(self.CREATE_INDEX)
-            conn.commit()
+        with self._lock:
+            with self._get_connection() as conn:
+                conn.execute(self.CREATE_TABLE)
+                for statement in self.CREATE_INDEXES:
+                    conn.execute(statement)
+                conn.commit()
         
         logger.debug(f"SQLite queue initialized: {self.db_path}")
     
     def _get_connection(self) -> sqlite3.Connection:
-        """Get a database connection."""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        return conn
+        """
+        Get the shared database connection.
+        
+        The connection is opened once and reused; callers must hold
+        self._lock while using it.
+        """
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._conn = conn
+        return self._conn
+    
+    def close(self):
+        """Close the shared database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
     
     def enqueue(
         self,
@@ -144,44 +175,62 @@ class SQLiteQueue:
         Returns:
             QueueItem or None if queue is empty
         """
+        items = self.dequeue_batch(1, status)
+        return items[0] if items else None
+    
+    def dequeue_batch(self, limit: int, status: str = 'pending') -> List[QueueItem]:
+        """
+        Get up to `limit` of the oldest items, claimed in one transaction.
+        
+        Args:
+            limit: Maximum number of items
+            status: Status to filter by
+            
+        Returns:
+            QueueItems in created_at order (empty if queue is empty)
+        """
         with self._lock:
             with self._get_connection() as conn:
-                row = conn.execute(
+                rows = conn.execute(
                     """
                     SELECT * FROM upload_queue 
                     WHERE status = ?
                     ORDER BY created_at ASC
-                    LIMIT 1
+                    LIMIT ?
                     """,
-                    (status,)
-                ).fetchone()
+                    (status, limit)
+                ).fetchall()
                 
-                if not row:
-                    return None
+                if not rows:
+                    return []
                 
                 # Mark as uploading
-                conn.execute(
+                now = datetime.now()
+                conn.executemany(
                     """
                     UPDATE upload_queue 
                     SET status = 'uploading', updated_at = ?
                     WHERE id = ?
                     """,
-                    (datetime.now().isoformat(), row['id'])
+                    [(now.isoformat(), row['id']) for row in rows]
                 )
                 conn.commit()
                 
-                return QueueItem(
-                    id=row['id'],
-                    table_name=row['table_name'],
-                    payload=json.loads(row['payload']),
-                    file_path=row['file_path'],
-                    hash_sha256=row['hash_sha256'],
-                    status='uploading',
-                    attempts=row['attempts'],
-                    last_error=row['last_error'],
-                    created_at=datetime.fromisoformat(row['created_at']),
-                    updated_at=datetime.now()
-                )
+                return [
+                    QueueItem(
+                        id=row['id'],
+                        table_name=row['table_name'],
+                        payload=json.loads(row['payload']),
+                        file_path=row['file_path'],
+                        hash_sha256=row['hash_sha256'],
+                        status='uploading',
+                        attempts=row['attempts'],
+                        last_error=row['last_error'],
+                        created_at=datetime.fromisoformat(row['created_at']),
+                        updated_at=now
+                    )
+                    for row in rows
+                ]
     
     def mark_success(self, item_id: int):
         """Mark an item as successfully uploaded."""
@@ -199,6 +248,26 @@ class SQLiteQueue:
         
         logger.debug(f"Queue item {item_id} marked success")
     
+    def mark_success_many(self, item_ids: List[int]):
+        """Mark several items as successfully uploaded in one transaction."""
+        if not item_ids:
+            return
+        
+        now = datetime.now().isoformat()
+        with self._lock:
+            with self._get_connection() as conn:
+                conn.executemany(
+                    """
+                    UPDATE upload_queue 
+                    SET status = 'success', updated_at = ?
+                    WHERE id = ?
+                    """,
+                    [(now, item_id) for item_id in item_ids]
+                )
+                conn.commit()
+        
+        logger.debug(f"{len(item_ids)} queue items marked success")
+    
     def mark_failed(self, item_id: int, error: str):
         """Mark an item as failed with error."""
         with self._lock:
@@ -243,19 +312,30 @@ class SQLiteQueue:
     
     def get_pending_count(self) -> int:
         """Get count of pending items."""
-        with self._get_connection() as conn:
-            row = conn.execute(
-                "SELECT COUNT(*) as count FROM upload_queue WHERE status = 'pending'"
-            ).fetchone()
-            return row['count'] if row else 0
+        with self._lock:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT COUNT(*) as count FROM upload_queue WHERE status = 'pending'"
+                ).fetchone()
+                return row['count'] if row else 0
     
     def get_failed_count(self) -> int:
         """Get count of failed items."""
-        with self._get_connection() as conn:
-            row = conn.execute(
-                "SELECT COUNT(*) as count FROM upload_queue WHERE status = 'failed'"
-            ).fetchone()
-            return row['count'] if row else 0
+        with self._lock:
+            with self._get_connection() as conn:
+                row = conn.execute(
+                    "SELECT COUNT(*) as count FROM upload_queue WHERE status = 'failed'"
+                ).fetchone()
+                return row['count'] if row else 0
+    
+    def get_status_counts(self) -> Dict[str, int]:
+        """Get item counts for every status in a single query."""
+        with self._lock:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT status, COUNT(*) as count FROM upload_queue GROUP BY status"
+                ).fetchall()
+                return {row['status']: row['count'] for row in rows}
     
     def cleanup_old(self, days: int = 7):
         """
@@ -285,24 +365,25 @@ class SQLiteQueue:
         """Get all pending items."""
         items = []
         
-        with self._get_connection() as conn:
-            rows = conn.execute(
-                "SELECT * FROM upload_queue WHERE status = 'pending' ORDER BY created_at"
-            ).fetchall()
-            
-            for row in rows:
-                items.append(QueueItem(
-                    id=row['id'],
-                    table_name=row['table_name'],
-                    payload=json.loads(row['payload']),
-                    file_path=row['file_path'],
-                    hash_sha256=row['hash_sha256'],
-                    status=row['status'],
-                    attempts=row['attempts'],
-                    last_error=row['last_error'],
-                    created_at=datetime.fromisoformat(row['created_at']),
-                    updated_at=datetime.fromisoformat(row['updated_at'])
-                ))
+        with self._lock:
+            with self._get_connection() as conn:
+                rows = conn.execute(
+                    "SELECT * FROM upload_queue WHERE status = 'pending' ORDER BY created_at"
+                ).fetchall()
+        
+        for row in rows:
+            items.append(QueueItem(
+                id=row['id'],
+                table_name=row['table_name'],
+                payload=json.loads(row['payload']),
+                file_path=row['file_path'],
+                hash_sha256=row['hash_sha256'],
+                status=row['status'],
+                attempts=row['attempts'],
+                last_error=row['last_error'],
+                created_at=datetime.fromisoformat(row['created_at']),
+                updated_at=datetime.fromisoformat(row['updated_at'])
+            ))
         
         return items
 
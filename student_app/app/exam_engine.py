@@ -6,6 +6,7 @@ Core exam management and orchestration.
 
 import logging
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Optional, Callable, List, Dict, Any
 from dataclasses import dataclass
@@ -22,6 +23,9 @@ from student_app.app.db.sqlite_queue import get_sqlite_queue
 
 logger = logging.getLogger(__name__)
 
+# Worker threads for evidence clip encoding
+EVIDENCE_WORKERS = 2
+
 
 @dataclass
 class ExamState:
@@ -80,9 +84,17 @@ class ExamEngine:
         self.queue = get_sqlite_queue()
         
         # Set up classifier callback
-        self.classifier.on_violation = self._handle_violation
+        self.classifier.add_listener(self._handle_violation)
         
         self._lock = threading.Lock()
+        
+        # Violations of severity >= 8, counted as they arrive so the
+        # auto-termination check does not rescan the violation list
+        self._high_severity_count = 0
+        
+        # Clip encoding takes seconds, so it runs off the detection thread;
+        # one pool per exam, created when it starts and drained when it ends
+        self._evidence_executor: Optional[ThreadPoolExecutor] = None
     
     def authenticate(self, hall_ticket: str) -> AuthResult:
         """
@@ -148,6 +160,9 @@ class ExamEngine:
                 self.state.attempt_id = attempt["id"]
                 self.state.start_time = datetime.now(timezone.utc)
                 self.state.status = "ACTIVE"
+                self._evidence_executor = ThreadPoolExecutor(
+                    max_workers=EVIDENCE_WORKERS, thread_name_prefix="evidence"
+                )
             
             # Start background services
             self.uploader.start()
@@ -211,6 +226,10 @@ class ExamEngine:
                     end_time=self.state.end_time
                 )
             
+            # Finish clips queued for the last violations so they are in
+            # the upload queue before the uploader stops
+            self._evidence_executor.shutdown(wait=True)
+            
             # Stop services
             self.uploader.stop()
             
@@ -255,6 +274,9 @@ class ExamEngine:
         """Handle a detected violation."""
         with self._lock:
             self.state.violations.append(violation)
+            if violation.severity >= 8:
+                self._high_severity_count += 1
+            high_severity_count = self._high_severity_count
         
         # Record in Supabase
         if self.state.attempt_id:
@@ -265,22 +287,33 @@ class ExamEngine:
                 description=violation.description
             )
             
-            # Extract evidence clip if severe
+            # Extract evidence clip if severe. Checked under the lock so no
+            # clip is queued once _end_exam has shut the executor down.
             if violation.severity >= 7 and violation.evidence_start:
-                self._extract_evidence(violation)
+                with self._lock:
+                    if self.state.status == "ACTIVE":
+                        self._evidence_executor.submit(
+                            self._extract_evidence, violation, self.state.attempt_id
+                        )
         
         # Notify UI
         if self.on_violation:
             self.on_violation(violation)
         
         # Check for auto-termination
-        if violation.severity >= 10 or len(self.state.violations) >= 3:
-            high_severity = [v for v in self.state.violations if v.severity >= 8]
-            if len(high_severity) >= 3:
-                self.terminate_exam("Too many severe violations")
+        if high_severity_count >= 3:
+            self.terminate_exam("Too many severe violations")
     
-    def _extract_evidence(self, violation: Violation):
-        """Extract and queue evidence for upload."""
+    def _extract_evidence(self, violation: Violation, attempt_id: str):
+        """
+        Extract and queue evidence for upload.
+        
+        Runs on the evidence executor.
+        
+        Args:
+            violation: Violation to capture evidence for
+            attempt_id: Attempt the violation belongs to
+        """
         try:
             clip = self.clip_extractor.extract_around_event(
                 event_time=violation.occurred_at,
@@ -294,7 +327,7 @@ class ExamEngine:
                 self.queue.enqueue(
                     table_name="evidence",
                     payload={
-                        "attempt_id": self.state.attempt_id,
+                        "attempt_id": attempt_id,
                         "event_type": violation.violation_type,
                         "captured_at": clip.start_time.isoformat(),
                         "duration_seconds": clip.duration_seconds,
@@ -6,6 +6,7 @@ Detects debuggers, VMs, screen recorders, and other security threats.
 
 import sys
 import os
+import re
 import subprocess
 import logging
 from typing import List, Optional
@@ -36,6 +37,9 @@ VM_INDICATORS = {
     ],
 }
 
+# DMI product names reported by common hypervisors (Linux)
+VM_DMI_PRODUCTS = ("virtual", "vmware", "virtualbox", "kvm", "qemu", "xen")
+
 # Known debugger processes
 DEBUGGER_PROCESSES = [
     "ollydbg", "x64dbg", "x32dbg", "windbg",
@@ -79,6 +83,23 @@ VIRTUAL_CAMERAS = [
 ]
 
 
+def _compile_keywords(keywords: List[str]) -> "re.Pattern":
+    """Build a case-insensitive pattern matching any of the keywords."""
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+
+# One compiled alternation per category, so each process name is scanned
+# once per category rather than once per keyword
+VM_PROCESS_PATTERN = _compile_keywords(VM_INDICATORS["processes"])
+DEBUGGER_PATTERN = _compile_keywords(DEBUGGER_PROCESSES)
+SCREEN_RECORDER_PATTERN = _compile_keywords(SCREEN_RECORDERS)
+REMOTE_DESKTOP_PATTERN = _compile_keywords(REMOTE_DESKTOP)
+VIRTUAL_CAMERA_PATTERN = _compile_keywords(VIRTUAL_CAMERAS)
+
+# Tracer line in /proc/self/status
+TRACER_PID_PATTERN = re.compile(r"^TracerPid:\s*(\d+)", re.MULTILINE)
+
+
 def check_security_environment() -> List[str]:
     """
     Comprehensive security environment check.
@@ -87,35 +108,39 @@ def check_security_environment() -> List[str]:
     """
     issues = []
     
+    # Take one process snapshot for all process-based checks; listing
+    # processes (wmic) is by far the most expensive part of the scan
+    processes = _get_running_processes_windows() if sys.platform == 'win32' else None
+    
     # Check for debuggers
-    debuggers = detect_debuggers()
+    debuggers = detect_debuggers(processes)
     if debuggers:
         issues.extend([f"Debugger detected: {d}" for d in debuggers])
     
     # Check for VMs
-    vm_detected = detect_virtualization()
+    vm_detected = detect_virtualization(processes)
     if vm_detected:
         issues.append(f"Virtual machine detected: {vm_detected}")
     
     # Check for screen recorders
-    recorders = detect_screen_recorders()
+    recorders = detect_screen_recorders(processes)
     if recorders:
         issues.extend([f"Screen recorder detected: {r}" for r in recorders])
     
     # Check for remote desktop
-    remote = detect_remote_desktop()
+    remote = detect_remote_desktop(processes)
     if remote:
         issues.extend([f"Remote desktop detected: {r}" for r in remote])
     
     # Check for virtual cameras
-    vcams = detect_virtual_cameras()
+    vcams = detect_virtual_cameras(processes)
     if vcams:
         issues.extend([f"Virtual camera detected: {v}" for v in vcams])
     
     return issues
 
 
-def detect_debuggers() -> List[str]:
+def detect_debuggers(processes: Optional[List[str]] = None) -> List[str]:
     """Detect running debugger processes."""
     detected = []
     
@@ -129,13 +154,7 @@ def detect_debuggers() -> List[str]:
                 detected.append("kernel32.IsDebuggerPresent")
             
             # Check for debugger processes
-            running = _get_running_processes_windows()
-            for proc in running:
-                proc_lower = proc.lower()
-                for debugger in DEBUGGER_PROCESSES:
-                    if debugger in proc_lower:
-                        detected.append(proc)
-                        break
+            detected.extend(_match_processes(processes, DEBUGGER_PATTERN))
                         
         except Exception as e:
             logger.debug(f"Debugger detection error: {e}")
@@ -145,18 +164,16 @@ def detect_debuggers() -> List[str]:
         try:
             status_path = Path("/proc/self/status")
             if status_path.exists():
-                for line in status_path.read_text().split('\n'):
-                    if line.startswith('TracerPid:'):
-                        pid = int(line.split(':')[1].strip())
-                        if pid != 0:
-                            detected.append(f"TracerPid: {pid}")
+                match = TRACER_PID_PATTERN.search(status_path.read_text())
+                if match and match.group(1) != "0":
+                    detected.append(f"TracerPid: {int(match.group(1))}")
         except Exception:
             pass
     
     return detected
 
 
-def detect_virtualization() -> Optional[str]:
+def detect_virtualization(processes: Optional[List[str]] = None) -> Optional[str]:
     """Detect if running in a virtual machine."""
     
     if sys.platform == 'win32':
@@ -179,12 +196,9 @@ def detect_virtualization() -> Optional[str]:
                     return f"File: {file_path}"
             
             # Check running processes
-            running = _get_running_processes_windows()
-            for proc in running:
-                proc_lower = proc.lower()
-                for vm_proc in VM_INDICATORS["processes"]:
-                    if vm_proc in proc_lower:
-                        return f"Process: {proc}"
+            vm_procs = _match_processes(processes, VM_PROCESS_PATTERN)
+            if vm_procs:
+                return f"Process: {vm_procs[0]}"
                         
         except Exception as e:
             logger.debug(f"VM detection error: {e}")
@@ -195,8 +209,7 @@ def detect_virtualization() -> Optional[str]:
             dmi_path = Path("/sys/class/dmi/id/product_name")
             if dmi_path.exists():
                 product = dmi_path.read_text().strip().lower()
-                vm_products = ["virtual", "vmware", "virtualbox", "kvm", "qemu", "xen"]
-                for vm in vm_products:
+                for vm in VM_DMI_PRODUCTS:
                     if vm in product:
                         return f"DMI: {product}"
         except Exception:
@@ -218,18 +231,12 @@ def detect_virtualization() -> Optional[str]:
     return None
 
 
-def detect_screen_recorders() -> List[str]:
+def detect_screen_recorders(processes: Optional[List[str]] = None) -> List[str]:
     """Detect running screen recording software."""
     detected = []
     
     if sys.platform == 'win32':
-        running = _get_running_processes_windows()
-        for proc in running:
-            proc_lower = proc.lower()
-            for recorder in SCREEN_RECORDERS:
-                if recorder in proc_lower:
-                    detected.append(proc)
-                    break
+        detected.extend(_match_processes(processes, SCREEN_RECORDER_PATTERN))
     
     elif sys.platform == 'darwin':
         # macOS: Check for known recorders
@@ -246,7 +253,7 @@ def detect_screen_recorders() -> List[str]:
     return detected
 
 
-def detect_remote_desktop() -> List[str]:
+def detect_remote_desktop(processes: Optional[List[str]] = None) -> List[str]:
     """Detect remote desktop software."""
     detected = []
     
@@ -260,13 +267,7 @@ def detect_remote_desktop() -> List[str]:
                 detected.append("Windows Remote Session")
             
             # Check for remote desktop processes
-            running = _get_running_processes_windows()
-            for proc in running:
-                proc_lower = proc.lower()
-                for remote in REMOTE_DESKTOP:
-                    if remote in proc_lower:
-                        detected.append(proc)
-                        break
+            detected.extend(_match_processes(processes, REMOTE_DESKTOP_PATTERN))
                         
         except Exception as e:
             logger.debug(f"Remote desktop detection error: {e}")
@@ -274,18 +275,12 @@ def detect_remote_desktop() -> List[str]:
     return detected
 
 
-def detect_virtual_cameras() -> List[str]:
+def detect_virtual_cameras(processes: Optional[List[str]] = None) -> List[str]:
     """Detect virtual camera drivers."""
     detected = []
     
     if sys.platform == 'win32':
-        running = _get_running_processes_windows()
-        for proc in running:
-            proc_lower = proc.lower()
-            for vcam in VIRTUAL_CAMERAS:
-                if vcam in proc_lower:
-                    detected.append(proc)
-                    break
+        detected.extend(_match_processes(processes, VIRTUAL_CAMERA_PATTERN))
     
     # Additional OpenCV-based detection could be added here
     # by checking camera properties for virtual indicators
@@ -293,6 +288,27 @@ def detect_virtual_cameras() -> List[str]:
     return detected
 
 
+def _match_processes(
+    processes: Optional[List[str]],
+    pattern: "re.Pattern"
+) -> List[str]:
+    """
+    Get processes whose name contains any of a category's keywords.
+    
+    Args:
+        processes: Process snapshot (taken now if None)
+        pattern: Compiled keyword pattern (see _compile_keywords)
+        
+    Returns:
+        Matching process names, in snapshot order
+    """
+    if processes is None:
+        processes = _get_running_processes_windows()
+    
+    search = pattern.search
+    return [proc for proc in processes if search(proc)]
+
+
 def _get_running_processes_windows() -> List[str]:
     """Get list of running process names on Windows."""
     processes = []
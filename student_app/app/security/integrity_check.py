@@ -13,6 +13,9 @@ from typing import Tuple, Optional
 
 logger = logging.getLogger(__name__)
 
+# Read buffer size for file hashing
+HASH_CHUNK_SIZE = 1024 * 1024
+
 
 def verify_integrity() -> Tuple[bool, str]:
     """
@@ -124,9 +127,12 @@ def compute_file_hash(file_path: Path) -> str:
     """Compute SHA-256 hash of a file."""
     sha256 = hashlib.sha256()
     
+    buf = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buf)
+    
     with open(file_path, 'rb') as f:
-        while chunk := f.read(8192):
-            sha256.update(chunk)
+        while n := f.readinto(buf):
+            sha256.update(view[:n])
     
     return sha256.hexdigest()
 
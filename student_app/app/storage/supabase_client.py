@@ -6,9 +6,10 @@ REST API client for Supabase database and storage operations.
 
 import logging
 import hashlib
+import importlib.util
 import json
 from datetime import datetime, timezone
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from pathlib import Path
 import httpx
 
@@ -16,6 +17,27 @@ from student_app.app.config import get_config, SupabaseConfig
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 needs the optional 'h2' package (httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Keep-alive pool shared by all requests to the project
+CONNECTION_LIMITS = httpx.Limits(
+    max_connections=10,
+    max_keepalive_connections=4,
+    keepalive_expiry=60.0,
+)
+
+# Storage content types by evidence file suffix
+EVIDENCE_CONTENT_TYPES = {
+    ".mp4": "video/mp4",
+    ".webm": "video/webm",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".wav": "audio/wav",
+    ".mp3": "audio/mpeg",
+}
+
 
 class SupabaseClient:
     """
@@ -50,23 +72,48 @@ class SupabaseClient:
         self.api_key = config.key
         self.service_key = config.service_key or config.key
         
-        # HTTP client with retry support
+        # Request header sets, built once per (key, Prefer) combination
+        self._header_cache: Dict[Tuple[bool, str], Dict[str, str]] = {}
+        
+        # Persistent HTTP client; pooled keep-alive connections (multiplexed
+        # over HTTP/2 when available) avoid a TLS handshake per request
         self._client = httpx.Client(
             timeout=30.0,
             headers=self._default_headers(),
+            limits=CONNECTION_LIMITS,
+            http2=HTTP2_AVAILABLE,
         )
         
         self._async_client: Optional[httpx.AsyncClient] = None
     
-    def _default_headers(self, use_service_key: bool = False) -> Dict[str, str]:
-        """Get default headers for API requests."""
-        key = self.service_key if use_service_key else self.api_key
-        return {
-            "apikey": key,
-            "Authorization": f"Bearer {key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation",
-        }
+    def _default_headers(
+        self,
+        use_service_key: bool = False,
+        prefer: str = "return=representation"
+    ) -> Dict[str, str]:
+        """
+        Get default headers for API requests.
+        
+        The returned dict is shared between calls and must not be modified.
+        
+        Args:
+            use_service_key: Authenticate with the service key
+            prefer: PostgREST Prefer header value
+            
+        Returns:
+            Header dict
+        """
+        cache_key = (use_service_key, prefer)
+        headers = self._header_cache.get(cache_key)
+        if headers is None:
+            key = self.service_key if use_service_key else self.api_key
+            headers = self._header_cache[cache_key] = {
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+                "Content-Type": "application/json",
+                "Prefer": prefer,
+            }
+        return headers
     
     def _rest_url(self, table: str) -> str:
         """Get PostgREST URL for a table."""
@@ -315,8 +362,10 @@ class SupabaseClient:
             }
             
             # Use upsert with conflict resolution
-            headers = self._default_headers(use_service_key=True)
-            headers["Prefer"] = "resolution=merge-duplicates,return=representation"
+            headers = self._default_headers(
+                use_service_key=True,
+                prefer="resolution=merge-duplicates,return=representation"
+            )
             
             response = self._client.post(
                 url,
@@ -330,6 +379,56 @@ class SupabaseClient:
             logger.error(f"Error saving answer: {e}")
             return False
     
+    def save_answers(self, attempt_id: str, answers: List[Dict[str, Any]]) -> bool:
+        """
+        Save or update several answers in one request.
+        
+        PostgREST upserts a JSON array in a single statement, so a full
+        autosave costs one round trip instead of one per question.
+        
+        Args:
+            attempt_id: Exam attempt UUID
+            answers: Dicts with question_id, selected_option and
+                marked_for_review
+            
+        Returns:
+            True if successful
+        """
+        if not answers:
+            return True
+        
+        try:
+            url = self._rest_url("answers")
+            answered_at = datetime.now(timezone.utc).isoformat()
+            
+            payload = [
+                {
+                    "attempt_id": attempt_id,
+                    "question_id": answer["question_id"],
+                    "selected_option": answer["selected_option"],
+                    "marked_for_review": answer.get("marked_for_review", False),
+                    "answered_at": answered_at if answer["selected_option"] is not None else None,
+                }
+                for answer in answers
+            ]
+            
+            headers = self._default_headers(
+                use_service_key=True,
+                prefer="resolution=merge-duplicates,return=minimal"
+            )
+            
+            response = self._client.post(
+                url,
+                json=payload,
+                headers=headers
+            )
+            response.raise_for_status()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error saving answers: {e}")
+            return False
+    
     def create_malpractice_event(
         self,
         attempt_id: str,
@@ -475,12 +574,60 @@ class SupabaseClient:
             logger.error(f"Error creating audit log: {e}")
             return False
     
+    def insert_record(self, table: str, payload: Dict[str, Any]) -> bool:
+        """
+        Insert a prepared record into a table.
+        
+        Used for replaying queued writes over the pooled connection.
+        
+        Args:
+            table: Table name
+            payload: Record to insert
+            
+        Returns:
+            True if successful
+        """
+        return self.insert_records(table, [payload])
+    
+    def insert_records(self, table: str, payloads: List[Dict[str, Any]]) -> bool:
+        """
+        Insert several prepared records in one request.
+        
+        PostgREST inserts a JSON array as a single statement, so either
+        every record is stored or none is.
+        
+        Args:
+            table: Table name
+            payloads: Records to insert (same columns)
+            
+        Returns:
+            True if successful
+        """
+        if not payloads:
+            return True
+        
+        try:
+            headers = self._default_headers(use_service_key=True, prefer="return=minimal")
+            
+            response = self._client.post(
+                self._rest_url(table),
+                json=payloads if len(payloads) > 1 else payloads[0],
+                headers=headers
+            )
+            response.raise_for_status()
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error inserting {len(payloads)} record(s) into {table}: {e}")
+            return False
+    
     # ==================== STORAGE OPERATIONS ====================
     
     def upload_evidence_file(
         self,
         file_path: Path,
-        bucket: str = "evidence"
+        bucket: str = "evidence",
+        data: Optional[bytes] = None
     ) -> Optional[str]:
         """
         Upload an evidence file to Supabase Storage.
@@ -488,6 +635,7 @@ class SupabaseClient:
         Args:
             file_path: Local path to file
             bucket: Storage bucket name
+            data: File contents if already read (skips reading file_path)
             
         Returns:
             Public URL of uploaded file, or None on failure
@@ -498,21 +646,12 @@ class SupabaseClient:
             storage_path = f"{timestamp}_{file_path.name}"
             
             # Read file
-            with open(file_path, "rb") as f:
-                file_data = f.read()
+            file_data = data if data is not None else file_path.read_bytes()
             
             # Determine content type
-            suffix = file_path.suffix.lower()
-            content_types = {
-                ".mp4": "video/mp4",
-                ".webm": "video/webm",
-                ".jpg": "image/jpeg",
-                ".jpeg": "image/jpeg",
-                ".png": "image/png",
-                ".wav": "audio/wav",
-                ".mp3": "audio/mpeg",
-            }
-            content_type = content_types.get(suffix, "application/octet-stream")
+            content_type = EVIDENCE_CONTENT_TYPES.get(
+                file_path.suffix.lower(), "application/octet-stream"
+            )
             
             # Upload
             url = self._storage_url(bucket, storage_path)
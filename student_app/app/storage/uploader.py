@@ -10,7 +10,7 @@ import time
 import hashlib
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict, List, Tuple
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
@@ -111,6 +111,14 @@ class BackgroundUploader:
     BACKOFF_FACTOR = 2.0
     MAX_ATTEMPTS = 5
     
+    # Queued items claimed and inserted per round
+    UPLOAD_BATCH_SIZE = 32
+    
+    # Queue maintenance (failed-item reset) runs at most this often
+    # instead of on every idle poll
+    IDLE_POLL_INTERVAL = 5.0  # seconds
+    MAINTENANCE_INTERVAL = 30.0  # seconds
+    
     def __init__(
         self,
         queue: Optional[SQLiteQueue] = None,
@@ -133,7 +141,9 @@ class BackgroundUploader:
         
         self._running = False
         self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
         self._current_retry_delay = self.MIN_RETRY_DELAY
+        self._next_maintenance = 0.0  # monotonic deadline
     
     def start(self):
         """Start background upload service."""
@@ -141,6 +151,7 @@ class BackgroundUploader:
             return
         
         self._running = True
+        self._stop_event.clear()
         self._thread = threading.Thread(target=self._upload_loop, daemon=True)
         self._thread.start()
         
@@ -149,6 +160,7 @@ class BackgroundUploader:
     def stop(self):
         """Stop background upload service."""
         self._running = False
+        self._stop_event.set()
         
         if self._thread:
             self._thread.join(timeout=5.0)
@@ -160,45 +172,52 @@ class BackgroundUploader:
         """Main upload loop."""
         while self._running:
             try:
-                # Get next pending item
-                item = self.queue.dequeue()
+                # Claim a batch of pending items
+                items = self.queue.dequeue_batch(self.UPLOAD_BATCH_SIZE)
                 
-                if item is None:
+                if not items:
                     # No pending items, retry failed ones
-                    retry_count = self.queue.retry_failed(self.MAX_ATTEMPTS)
-                    
-                    if retry_count > 0:
-                        logger.debug(f"Reset {retry_count} failed items for retry")
+                    self._run_maintenance()
                     
                     # Wait before checking again
-                    time.sleep(5.0)
+                    self._stop_event.wait(self.IDLE_POLL_INTERVAL)
                     continue
                 
-                # Process item
-                success = self._upload_item(item)
+                # Process batch
+                results = self._upload_batch(items)
+                succeeded = [item.id for item, success in results if success]
+                self.queue.mark_success_many(succeeded)
                 
-                if success:
-                    self.queue.mark_success(item.id)
+                if self.on_upload_complete:
+                    for item, success in results:
+                        self.on_upload_complete(item, success)
+                
+                if len(succeeded) == len(results):
                     self._current_retry_delay = self.MIN_RETRY_DELAY
-                    
-                    if self.on_upload_complete:
-                        self.on_upload_complete(item, True)
                 else:
-                    # Already marked as failed in _upload_item
+                    # Failures are already marked in _upload_batch
                     self._current_retry_delay = min(
                         self._current_retry_delay * self.BACKOFF_FACTOR,
                         self.MAX_RETRY_DELAY
                     )
                     
-                    if self.on_upload_complete:
-                        self.on_upload_complete(item, False)
-                    
-                    # Wait with backoff
-                    time.sleep(self._current_retry_delay)
+                    # Wait with backoff (interrupted by stop())
+                    self._stop_event.wait(self._current_retry_delay)
                     
             except Exception as e:
                 logger.error(f"Upload loop error: {e}")
-                time.sleep(5.0)
+                self._stop_event.wait(5.0)
+    
+    def _run_maintenance(self):
+        """Reset failed items for retry, if the interval has elapsed."""
+        now = time.monotonic()
+        if now < self._next_maintenance:
+            return
+        self._next_maintenance = now + self.MAINTENANCE_INTERVAL
+        
+        retry_count = self.queue.retry_failed(self.MAX_ATTEMPTS)
+        if retry_count > 0:
+            logger.debug(f"Reset {retry_count} failed items for retry")
     
     def _upload_item(self, item: QueueItem) -> bool:
         """
@@ -210,6 +229,62 @@ class BackgroundUploader:
         Returns:
             True if successful
         """
+        return self._upload_batch([item])[0][1]
+    
+    def _upload_batch(self, items: List[QueueItem]) -> List[Tuple[QueueItem, bool]]:
+        """
+        Upload queue items, inserting their records one request per table.
+        
+        Failed items are marked failed in the queue; successful ones are
+        left for the caller to mark.
+        
+        Args:
+            items: Claimed queue items
+            
+        Returns:
+            (item, success) pairs
+        """
+        results: List[Tuple[QueueItem, bool]] = []
+        by_table: Dict[str, List[Tuple[QueueItem, dict]]] = {}
+        
+        for item in items:
+            payload = self._prepare_payload(item)
+            if payload is None:
+                results.append((item, False))
+            else:
+                by_table.setdefault(item.table_name, []).append((item, payload))
+        
+        for table_name, entries in by_table.items():
+            payloads = [payload for _, payload in entries]
+            
+            if self.client.insert_records(table_name, payloads):
+                outcomes = [True] * len(entries)
+            elif len(entries) > 1:
+                # One bad record fails the whole statement; retry singly so
+                # only the offending records are marked failed
+                outcomes = [self._insert_record(table_name, p) for p in payloads]
+            else:
+                outcomes = [False]
+            
+            for (item, _), success in zip(entries, outcomes):
+                if success:
+                    logger.info(f"Successfully uploaded item {item.id}")
+                else:
+                    self.queue.mark_failed(item.id, "Database insert failed")
+                results.append((item, success))
+        
+        return results
+    
+    def _prepare_payload(self, item: QueueItem) -> Optional[dict]:
+        """
+        Upload an item's evidence file (if any) and build its record.
+        
+        Args:
+            item: Queue item to prepare
+            
+        Returns:
+            Record payload, or None if the item failed (already marked)
+        """
         try:
             logger.debug(f"Uploading item {item.id} to {item.table_name}")
             
@@ -222,72 +297,46 @@ class BackgroundUploader:
                     error = f"File not found: {item.file_path}"
                     logger.error(error)
                     self.queue.mark_failed(item.id, error)
-                    return False
+                    return None
+                
+                # Read once: the same bytes are verified and uploaded, so a
+                # retry costs one file read rather than two
+                file_data = file_path.read_bytes()
                 
                 # Verify integrity
-                actual_hash = self._compute_hash(file_path)
+                actual_hash = hashlib.sha256(file_data).hexdigest()
                 if actual_hash != item.hash_sha256:
                     error = "File integrity check failed"
                     logger.error(f"{error}: expected {item.hash_sha256}, got {actual_hash}")
                     self.queue.mark_failed(item.id, error)
-                    return False
+                    return None
                 
                 # Upload file
-                storage_url = self.client.upload_evidence_file(file_path)
+                storage_url = self.client.upload_evidence_file(file_path, data=file_data)
                 
                 if not storage_url:
                     error = "File upload failed"
                     self.queue.mark_failed(item.id, error)
-                    return False
+                    return None
             
             # Update payload with storage URL if needed
             payload = item.payload.copy()
             if storage_url and 'storage_url' in payload:
                 payload['storage_url'] = storage_url
             
-            # Insert record into Supabase
-            success = self._insert_record(item.table_name, payload)
-            
-            if not success:
-                error = "Database insert failed"
-                self.queue.mark_failed(item.id, error)
-                return False
-            
-            logger.info(f"Successfully uploaded item {item.id}")
-            return True
+            return payload
             
         except Exception as e:
             error = str(e)
             logger.error(f"Upload error for item {item.id}: {error}")
             self.queue.mark_failed(item.id, error)
-            return False
-    
-    def _compute_hash(self, file_path: Path) -> str:
-        """Compute SHA-256 hash of a file."""
-        sha256 = hashlib.sha256()
-        
-        with open(file_path, 'rb') as f:
-            while chunk := f.read(8192):
-                sha256.update(chunk)
-        
-        return sha256.hexdigest()
+            return None
     
     def _insert_record(self, table_name: str, payload: dict) -> bool:
         """Insert a record into Supabase."""
-        try:
-            import httpx
-            
-            url = f"{self.client.base_url}/rest/v1/{table_name}"
-            headers = self.client._default_headers(use_service_key=True)
-            
-            response = httpx.post(url, json=payload, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Insert error: {e}")
-            return False
+        # Goes through the client's keep-alive pool rather than a one-off
+        # connection (and TLS handshake) per queued item
+        return self.client.insert_record(table_name, payload)
     
     def upload_now(self, item: QueueItem) -> bool:
         """
@@ -303,10 +352,11 @@ class BackgroundUploader:
     
     def get_status(self) -> dict:
         """Get uploader status."""
+        counts = self.queue.get_status_counts()
         return {
             "running": self._running,
-            "pending_count": self.queue.get_pending_count(),
-            "failed_count": self.queue.get_failed_count(),
+            "pending_count": counts.get("pending", 0),
+            "failed_count": counts.get("failed", 0),
             "current_retry_delay": self._current_retry_delay
         }
 
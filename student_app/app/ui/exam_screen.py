@@ -5,8 +5,9 @@ MCQ exam interface with question navigation and auto-save.
 """
 
 import logging
-from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Set
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QFrame, QScrollArea, QButtonGroup, QRadioButton,
@@ -16,11 +17,39 @@ from PySide6.QtCore import Qt, Signal, QTimer, QThread
 
 logger = logging.getLogger(__name__)
 
+# Worker threads for Supabase writes issued from the GUI thread
+NETWORK_WORKERS = 2
+
+# Question navigator button stylesheets, built once per state
+GRID_BUTTON_COLORS = {
+    "current": "#4da6ff",
+    "answered": "#00c853",
+    "review": "#ff9900",
+    "not_visited": "#555555",
+}
+GRID_BUTTON_STYLES = {
+    state: f"""
+            QPushButton {{
+                background-color: {color};
+                color: white;
+                border: none;
+                border-radius: 4px;
+                font-size: 12px;
+                font-weight: bold;
+            }}
+        """
+    for state, color in GRID_BUTTON_COLORS.items()
+}
+
 
 class ProctorWorker(QThread):
     """Background worker for AI proctoring."""
     
-    violation_detected = Signal(str, int)  # message, severity
+    violation_detected = Signal(str, str, int)  # violation type, message, severity
+    
+    # Frame sampling (performance)
+    ANALYZE_EVERY_N_FRAMES = 3     # Run detectors on every 3rd frame
+    VERIFY_EVERY_N_ANALYZED = 10   # Face verification every 10th analyzed frame
     
     def __init__(self, camera_index: int = 0, photo_url: str = None):
         super().__init__()
@@ -30,14 +59,17 @@ class ProctorWorker(QThread):
     
     def run(self):
         """Main proctoring loop."""
-        import cv2
         from student_app.app.ai import (
             get_face_detector, get_head_pose_estimator, 
             get_gaze_tracker, get_event_classifier,
             get_face_verifier, is_face_verification_available
         )
         from student_app.app.ai.event_classifier import DetectionEvent, EventType
+        from student_app.app.ai.head_pose import HeadPose
         from student_app.app.buffer import get_circular_buffer
+        from student_app.app.config import get_config
+        from student_app.app.utils.camera import open_camera
+        from student_app.app.utils.image import bgr_to_rgb
         
         self._running = True
         
@@ -57,74 +89,95 @@ class ProctorWorker(QThread):
                     logger.warning("Could not load reference photo for face verification")
                     face_verifier = None
         
-        # Setup violation callback
-        def on_violation(violation):
-            self.violation_detected.emit(violation.description, violation.severity)
-        classifier.on_violation = on_violation
-        
         # Open camera
-        cap = cv2.VideoCapture(self.camera_index)
+        cap = open_camera(self.camera_index)
         if not cap.isOpened():
             logger.error("Could not open camera for proctoring")
             return
         
+        # Setup violation callback
+        def on_violation(violation):
+            self.violation_detected.emit(
+                violation.violation_type, violation.description, violation.severity
+            )
+        classifier.add_listener(on_violation)
+        
         logger.info("Proctoring started")
         
-        frame_count = 0
+        # Policy thresholds are fixed for the exam, so read them once here
+        # rather than walking the config on every analyzed frame
+        head_turn_threshold = get_config().thresholds.HEAD_ROTATION_ANGLE
+        
+        # Head turn checks, tried in order; the first match is reported
+        head_turn_events = (
+            (HeadPose.is_looking_left, EventType.HEAD_LEFT),
+            (HeadPose.is_looking_right, EventType.HEAD_RIGHT),
+        )
+        
+        # Countdown counters instead of modulo tests on a frame index
+        analyze_countdown = self.ANALYZE_EVERY_N_FRAMES
+        verify_countdown = self.VERIFY_EVERY_N_ANALYZED
+        
+        # RGB copy of the analyzed frame, converted once and shared by the
+        # head pose, gaze and verification models
+        rgb_frame = None
+        # Analyzed frame number; lets head pose and gaze share one Face
+        # Mesh result per frame
+        frame_id = 0
         while self._running:
             ret, frame = cap.read()
             if not ret:
                 continue
             
-            frame_count += 1
             now = datetime.now()
             
             # Add frame to buffer
             buffer.add_frame(frame, now)
             
             # Process every 3rd frame for performance
-            if frame_count % 3 != 0:
+            analyze_countdown -= 1
+            if analyze_countdown:
                 continue
+            analyze_countdown = self.ANALYZE_EVERY_N_FRAMES
+            frame_id += 1
             
             # Face detection
             faces = face_detector.detect(frame)
+            face_count = len(faces)
             
-            if len(faces) == 0:
+            if face_count == 0:
                 classifier.add_event(DetectionEvent(
                     event_type=EventType.FACE_ABSENT,
                     timestamp=now,
                     confidence=0.9
                 ))
-            elif len(faces) > 1:
+            elif face_count > 1:
                 classifier.add_event(DetectionEvent(
                     event_type=EventType.FACE_MULTIPLE,
                     timestamp=now,
                     confidence=0.9,
-                    details={"count": len(faces)}
+                    details={"count": face_count}
                 ))
             else:
                 classifier.reset_face_absent()
             
+            rgb_frame = bgr_to_rgb(frame, rgb_frame)
+            
             # Head pose
-            pose = head_pose.estimate(frame)
+            pose = head_pose.estimate(frame, rgb_frame, frame_id)
             if pose:
-                if pose.is_looking_left():
-                    classifier.add_event(DetectionEvent(
-                        event_type=EventType.HEAD_LEFT,
-                        timestamp=now,
-                        confidence=pose.confidence,
-                        details={"yaw": pose.yaw}
-                    ))
-                elif pose.is_looking_right():
-                    classifier.add_event(DetectionEvent(
-                        event_type=EventType.HEAD_RIGHT,
-                        timestamp=now,
-                        confidence=pose.confidence,
-                        details={"yaw": pose.yaw}
-                    ))
+                for is_turned, event_type in head_turn_events:
+                    if is_turned(pose, head_turn_threshold):
+                        classifier.add_event(DetectionEvent(
+                            event_type=event_type,
+                            timestamp=now,
+                            confidence=pose.confidence,
+                            details={"yaw": pose.yaw}
+                        ))
+                        break
             
             # Gaze tracking
-            gaze = gaze_tracker.track(frame)
+            gaze = gaze_tracker.track(frame, rgb_frame, frame_id)
             if gaze and gaze.is_looking_away():
                 classifier.add_event(DetectionEvent(
                     event_type=EventType.GAZE_AWAY,
@@ -134,9 +187,16 @@ class ProctorWorker(QThread):
             else:
                 classifier.reset_gaze_tracking()
             
-            # Face verification (check every 10th frame for performance)
-            if face_verifier and frame_count % 10 == 0:
-                result = face_verifier.verify(frame)
+            # Face verification (check every 10th analyzed frame for performance)
+            verify_countdown -= 1
+            verify_due = verify_countdown == 0
+            if verify_due:
+                verify_countdown = self.VERIFY_EVERY_N_ANALYZED
+            # Head pose and gaze run on every frame since the Face Mesh still
+            # finds turned heads the frontal detector misses; the HOG
+            # verifier does not, so it is skipped when no face was detected
+            if face_verifier and verify_due and face_count > 0:
+                result = face_verifier.verify(frame, rgb_frame)
                 
                 # Check if we should alert based on consecutive mismatches
                 should_alert, alert_reason = face_verifier.should_alert()
@@ -157,6 +217,7 @@ class ProctorWorker(QThread):
                     # Reset tracking after alert to avoid spam
                     face_verifier.reset_tracking()
         
+        classifier.remove_listener(on_violation)
         cap.release()
         logger.info("Proctoring stopped")
     
@@ -191,6 +252,19 @@ class ExamScreen(QWidget):
         self.violations: List[str] = []  # List of violation descriptions
         self.exam_duration_minutes: int = 60
         
+        # Autosaves and violation reports are sent off the GUI thread on a
+        # small persistent pool instead of blocking the event loop
+        self._network_executor = ThreadPoolExecutor(
+            max_workers=NETWORK_WORKERS, thread_name_prefix="exam-net"
+        )
+        self._autosave_future: Optional[Future] = None
+        self._network_closed = False
+        
+        # Questions changed since the last periodic save; periodic saves
+        # send only these, the final save sends everything
+        self._dirty_answers: Set[str] = set()
+        self._inflight_answers: List[str] = []
+        
         self._setup_ui()
     
     def _setup_ui(self):
@@ -332,6 +406,7 @@ class ExamScreen(QWidget):
         self.question_grid = QGridLayout(grid_container)
         self.question_grid.setSpacing(8)
         self.question_buttons: List[QPushButton] = []
+        self._question_button_states: List[str] = []
         
         scroll.setWidget(grid_container)
         nav_panel_layout.addWidget(scroll)
@@ -479,6 +554,7 @@ class ExamScreen(QWidget):
             btn = QPushButton(str(i + 1))
             btn.setFixedSize(40, 40)
             btn.setStyleSheet(self._grid_button_style("not_visited"))
+            self._question_button_states.append("not_visited")
             btn.clicked.connect(lambda checked, idx=i: self._load_question(idx))
             
             row = i // cols
@@ -487,23 +563,7 @@ class ExamScreen(QWidget):
             self.question_buttons.append(btn)
     
     def _grid_button_style(self, state: str) -> str:
-        colors = {
-            "current": "#4da6ff",
-            "answered": "#00c853",
-            "review": "#ff9900",
-            "not_visited": "#555555",
-        }
-        color = colors.get(state, "#555555")
-        return f"""
-            QPushButton {{
-                background-color: {color};
-                color: white;
-                border: none;
-                border-radius: 4px;
-                font-size: 12px;
-                font-weight: bold;
-            }}
-        """
+        return GRID_BUTTON_STYLES.get(state, GRID_BUTTON_STYLES["not_visited"])
     
     def _load_question(self, index: int):
         """Load a question by index."""
@@ -559,6 +619,7 @@ class ExamScreen(QWidget):
     
     def _update_question_grid(self):
         """Update question grid button states."""
+        states = self._question_button_states
         for i, btn in enumerate(self.question_buttons):
             q_id = self.questions[i]["id"]
             
@@ -571,7 +632,10 @@ class ExamScreen(QWidget):
             else:
                 state = "not_visited"
             
-            btn.setStyleSheet(self._grid_button_style(state))
+            # setStyleSheet re-polishes the widget, so only touch changed buttons
+            if states[i] != state:
+                states[i] = state
+                btn.setStyleSheet(self._grid_button_style(state))
     
     def _on_option_selected(self):
         """Handle option selection."""
@@ -579,6 +643,7 @@ class ExamScreen(QWidget):
         if selected >= 0:
             q_id = self.questions[self.current_index]["id"]
             self.answers[q_id] = selected
+            self._dirty_answers.add(q_id)
             self._update_question_grid()
     
     def _go_previous(self):
@@ -593,6 +658,7 @@ class ExamScreen(QWidget):
         """Toggle review flag for current question."""
         q_id = self.questions[self.current_index]["id"]
         self.review_flags[q_id] = not self.review_flags.get(q_id, False)
+        self._dirty_answers.add(q_id)
         
         if self.review_flags[q_id]:
             self.mark_review_btn.setText("Remove Review Mark")
@@ -606,21 +672,20 @@ class ExamScreen(QWidget):
         if not self._end_time:
             return
         
-        remaining = self._end_time - datetime.now()
+        remaining = (self._end_time - datetime.now()).total_seconds()
         
-        if remaining.total_seconds() <= 0:
+        if remaining <= 0:
             # Time's up - auto-submit
             self._timer.stop()
             self._submit_exam("SUBMITTED")
             return
         
-        minutes = int(remaining.total_seconds() // 60)
-        seconds = int(remaining.total_seconds() % 60)
+        minutes, seconds = divmod(int(remaining), 60)
         
         self.timer_label.setText(f"Time Left: {minutes:02d}:{seconds:02d}")
         
         # Warning colors
-        if remaining.total_seconds() < 300:  # Less than 5 minutes
+        if remaining < 300:  # Less than 5 minutes
             self.timer_label.setStyleSheet("""
                 color: #ff6b6b;
                 font-size: 18px;
@@ -628,40 +693,81 @@ class ExamScreen(QWidget):
                 font-family: 'Consolas', monospace;
             """)
     
-    def _autosave(self):
-        """Auto-save answers."""
+    def _autosave(self, blocking: bool = False):
+        """
+        Auto-save answers.
+        
+        Args:
+            blocking: Save all answers on the calling thread (used for the
+                final save); otherwise only changed answers are sent
+        """
         if not self.attempt_id:
             return
         
+        # Settle the previous periodic save. A failed one puts its answers
+        # back in the dirty set so the next save retries them.
+        future = self._autosave_future
+        if future is not None:
+            if not future.done() and not blocking:
+                return  # Still in flight; try again next tick
+            if not future.result():
+                self._dirty_answers.update(self._inflight_answers)
+            self._autosave_future = None
+            self._inflight_answers = []
+        
+        if blocking:
+            q_ids = list(self.answers)
+        else:
+            # Only answered questions are stored (as before)
+            q_ids = [q_id for q_id in self._dirty_answers if q_id in self.answers]
+        self._dirty_answers.clear()
+        
+        if not q_ids:
+            return
+        
         from student_app.app.storage.supabase_client import get_supabase_client
         client = get_supabase_client()
         
-        for q_id, selected in self.answers.items():
-            client.save_answer(
-                attempt_id=self.attempt_id,
-                question_id=q_id,
-                selected_option=selected,
-                marked_for_review=self.review_flags.get(q_id, False)
+        # One bulk upsert rather than a request per answer. The payload is
+        # built here so the worker never reads the live answer dicts.
+        answers = [
+            {
+                "question_id": q_id,
+                "selected_option": self.answers[q_id],
+                "marked_for_review": self.review_flags.get(q_id, False)
+            }
+            for q_id in q_ids
+        ]
+        
+        if blocking:
+            client.save_answers(self.attempt_id, answers)
+        else:
+            self._inflight_answers = q_ids
+            self._autosave_future = self._network_executor.submit(
+                client.save_answers, self.attempt_id, answers
             )
         
-        logger.debug(f"Auto-saved {len(self.answers)} answers")
+        logger.debug(f"Auto-saved {len(answers)} answers")
     
-    def _on_violation(self, message: str, severity: int):
+    def _on_violation(self, violation_type: str, message: str, severity: int):
         """Handle proctoring violation."""
         logger.warning(f"Violation: {message} (severity {severity})")
         
         # Track violation
         self.violations.append(message)
         
-        # Record malpractice event
-        if self.attempt_id:
+        # Record malpractice event. Once the attempt is finalized the pool
+        # is shut down and late reports from queued signals are dropped.
+        if self.attempt_id and not self._network_closed:
             from student_app.app.storage.supabase_client import get_supabase_client
             client = get_supabase_client()
-            client.create_malpractice_event(
+            self._network_executor.submit(
+                client.create_malpractice_event,
                 attempt_id=self.attempt_id,
-                event_type=message.replace(" ", "_").lower(),
+                event_type=violation_type,
                 severity=severity,
-                description=message
+                description=message,
+                occurred_at=datetime.now(timezone.utc)
             )
         
         # Show warning for severe violations
@@ -703,8 +809,16 @@ class ExamScreen(QWidget):
         if self._autosave_timer:
             self._autosave_timer.stop()
         
-        # Final save
-        self._autosave()
+        # Let queued violation reports and periodic saves finish so
+        # nothing reaches the server after the attempt is finalized
+        self.shutdown_network()
+        
+        # Final save (waits for any in-flight periodic save first so it
+        # cannot land after this one)
+        self._autosave(blocking=True)
+        
+        # One timestamp for the attempt's end time and the time taken
+        now = datetime.now()
         
         # Update attempt status
         if self.attempt_id:
@@ -713,7 +827,7 @@ class ExamScreen(QWidget):
             client.update_exam_attempt(
                 attempt_id=self.attempt_id,
                 status=status,
-                end_time=datetime.now()
+                end_time=now
             )
         
         # Calculate exam statistics
@@ -723,7 +837,7 @@ class ExamScreen(QWidget):
         
         time_taken = 0
         if self.start_time:
-            time_taken = int((datetime.now() - self.start_time).total_seconds())
+            time_taken = int((now - self.start_time).total_seconds())
         
         exam_stats = {
             "answered": answered,
@@ -743,3 +857,8 @@ class ExamScreen(QWidget):
         """Forcefully terminate the exam."""
         logger.critical(f"Exam terminated: {reason}")
         self._submit_exam("TERMINATED")
+    
+    def shutdown_network(self):
+        """Wait for queued network writes and stop the worker pool."""
+        self._network_closed = True
+        self._network_executor.shutdown(wait=True)
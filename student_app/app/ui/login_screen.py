@@ -13,7 +13,8 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal, QThread
 from PySide6.QtGui import QFont, QPixmap, QImage, QPainter, QPainterPath, QColor, QBrush, QPen
 import cv2
-import os
+
+from student_app.app.utils.camera import open_camera
 
 logger = logging.getLogger(__name__)
 
@@ -77,6 +78,7 @@ class CameraPreview(QLabel):
         self._cap = None
         self._timer = None
         self._current_frame = None
+        self._display_buf = None
     
     def start(self, camera_index: int = 0):
         """Start camera preview."""
@@ -85,11 +87,7 @@ class CameraPreview(QLabel):
                 self._cap.release()
             
             # Try to open camera
-            if os.name == 'nt':
-                 self._cap = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)
-            
-            if self._cap is None or not self._cap.isOpened():
-                self._cap = cv2.VideoCapture(camera_index)
+            self._cap = open_camera(camera_index)
 
             if not self._cap.isOpened():
                 return
@@ -124,17 +122,21 @@ class CameraPreview(QLabel):
                 # Keep the frame for capture/auth
                 self._current_frame = frame
                 
-                # Prepare display image (RGB)
-                # Convert to RGB
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame_rgb.shape
-                
-                # Crop to square (center) for display
+                # Crop to square (center) for display; a view, no copy yet
+                h, w = frame.shape[:2]
                 min_dim = min(h, w)
                 start_x = (w - min_dim) // 2
                 start_y = (h - min_dim) // 2
-                # Memory copy is critical for QImage
-                frame_sq = frame_rgb[start_y:start_y+min_dim, start_x:start_x+min_dim].copy()
+                frame_sq = frame[start_y:start_y+min_dim, start_x:start_x+min_dim]
+                
+                # Convert only the cropped region to RGB, into a buffer reused
+                # across frames. QImage does not copy, so the buffer must
+                # outlive the image (it is kept on self).
+                if self._display_buf is None or self._display_buf.shape != frame_sq.shape:
+                    self._display_buf = cv2.cvtColor(frame_sq, cv2.COLOR_BGR2RGB)
+                else:
+                    cv2.cvtColor(frame_sq, cv2.COLOR_BGR2RGB, dst=self._display_buf)
+                frame_sq = self._display_buf
                 
                 height, width, channel = frame_sq.shape
                 bytes_per_line = channel * width
@@ -327,6 +327,9 @@ class MainWindow(QMainWindow):
             
             logger.warning("Close attempt blocked during exam")
         else:
+            # Flush violation reports still queued by the exam screen
+            if hasattr(self, 'exam_screen'):
+                self.exam_screen.shutdown_network()
             event.accept()
     
     def keyPressEvent(self, event):
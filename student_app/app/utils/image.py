@@ -0,0 +1,34 @@
+"""
+Student Exam Application - Image Utilities
+
+Frame conversion helpers shared by the MediaPipe-based AI modules.
+"""
+
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+def bgr_to_rgb(frame: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Convert a BGR frame to RGB for MediaPipe, reusing a buffer.
+
+    The result is marked read-only, which lets MediaPipe wrap the array
+    instead of copying it into its own image packet.
+
+    Args:
+        frame: BGR image from OpenCV
+        dst: Buffer returned by a previous call (reused if the shape matches)
+
+    Returns:
+        Read-only RGB image (pass it back as dst next time)
+    """
+    if dst is None or dst.shape != frame.shape:
+        dst = np.empty_like(frame)
+    else:
+        dst.flags.writeable = True
+
+    cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
+    dst.flags.writeable = False
+    return dst
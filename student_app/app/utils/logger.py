@@ -4,13 +4,17 @@ Student Exam Application - Logging Utilities
 Structured JSON logging with encryption support.
 """
 
+import atexit
+import copy
 import logging
 import json
+import queue
 import sys
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 
 class JSONFormatter(logging.Formatter):
@@ -18,7 +22,10 @@ class JSONFormatter(logging.Formatter):
     
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            # When the record was created, not when the listener formats it
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).strftime(
+                "%Y-%m-%dT%H:%M:%S.%fZ"
+            ),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -38,6 +45,70 @@ class JSONFormatter(logging.Formatter):
         return json.dumps(log_data)
 
 
+class ConsoleFormatter(logging.Formatter):
+    """
+    Human-readable formatter that renders each second's timestamp once.
+    
+    Only valid for date formats without sub-second fields.
+    """
+    
+    def __init__(self, fmt: str, datefmt: str):
+        super().__init__(fmt, datefmt)
+        self._cached_second: Optional[int] = None
+        self._cached_time = ""
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: Optional[str] = None) -> str:
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = super().formatTime(record, datefmt)
+            self._cached_second = second
+        return self._cached_time
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """
+    Stream handler that flushes on warnings and otherwise at most once per
+    FLUSH_INTERVAL, instead of after every record.
+    """
+    
+    # Seconds routine records may sit in the stream buffer
+    FLUSH_INTERVAL = 1.0
+    
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self._last_flush = time.monotonic()
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            
+            now = time.monotonic()
+            if record.levelno >= logging.WARNING or now - self._last_flush >= self.FLUSH_INTERVAL:
+                self.flush()
+                self._last_flush = now
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps exception info on queued records.
+    
+    The stock prepare() folds the traceback into the message and clears
+    exc_info, which would leave JSONFormatter without its "exception" field.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now, since they may not survive to the listener thread
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
 class AuditLogger:
     """
     Specialized logger for audit trail.
@@ -92,10 +163,16 @@ def setup_logging(log_file: Path, debug: bool = False):
     """
     Configure application logging.
     
+    Records are handed to a queue on the calling thread; formatting,
+    console output and file writes/rotation happen on a listener thread
+    so proctoring and UI threads never block on log I/O.
+    
     Args:
         log_file: Path to main log file
         debug: Enable debug level logging
     """
+    global _log_listener
+    
     # Ensure directory exists
     log_file.parent.mkdir(parents=True, exist_ok=True)
     
@@ -104,14 +181,13 @@ def setup_logging(log_file: Path, debug: bool = False):
     root_logger.setLevel(logging.DEBUG if debug else logging.INFO)
     
     # Console handler (human readable)
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = ConsoleHandler(sys.stdout)
     console_handler.setLevel(logging.DEBUG if debug else logging.INFO)
-    console_format = logging.Formatter(
+    console_format = ConsoleFormatter(
         "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     console_handler.setFormatter(console_format)
-    root_logger.addHandler(console_handler)
     
     # File handler (JSON structured)
     file_handler = RotatingFileHandler(
@@ -121,7 +197,14 @@ def setup_logging(log_file: Path, debug: bool = False):
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(JSONFormatter())
-    root_logger.addHandler(file_handler)
+    
+    # Route both handlers through the background listener
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root_logger.addHandler(RecordQueueHandler(log_queue))
+    _log_listener = QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _log_listener.start()
     
     # Reduce noise from third-party libraries
     logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -131,6 +214,21 @@ def setup_logging(log_file: Path, debug: bool = False):
     logging.info(f"Logging initialized. File: {log_file}, Debug: {debug}")
 
 
+# Background writer for the application log (see setup_logging)
+_log_listener: Optional[QueueListener] = None
+
+
+def _stop_log_listener():
+    """Drain queued records and stop the log listener."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+atexit.register(_stop_log_listener)
+
+
 # Global audit logger instance
 _audit_logger: Optional[AuditLogger] = None
 
@@ -41,6 +41,19 @@ class TestFaceDetector:
         
         assert isinstance(count, int)
         assert count >= 0
+    
+    def test_detect_batch(self):
+        """Test batch detection returns one result list per frame."""
+        from student_app.app.ai.face_detector import FaceDetector
+        
+        detector = FaceDetector()
+        frames = [np.zeros((480, 640, 3), dtype=np.uint8) for _ in range(5)]
+        frames.insert(2, None)
+        results = detector.detect_batch(frames, batch_size=4)
+        
+        assert len(results) == len(frames)
+        assert results[2] == []
+        assert all(isinstance(r, list) for r in results)
 
 
 class TestHeadPoseEstimator:
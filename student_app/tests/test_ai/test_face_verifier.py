@@ -86,6 +86,28 @@ class TestFaceVerifier:
         stats = verifier.get_stats()
         assert stats["consecutive_mismatches"] == 0
     
+    @pytest.mark.skipif(
+        not pytest.importorskip("face_recognition", reason="face_recognition not installed"),
+        reason="face_recognition not available"
+    )
+    def test_window_mismatch_alert(self):
+        """Test alert from mismatches within the time window."""
+        from student_app.app.ai.face_verifier import FaceVerifier
+        
+        verifier = FaceVerifier(consecutive_threshold=50)
+        
+        # Interleaved matches keep the consecutive count low
+        for _ in range(10):
+            verifier._track_result(is_match=False)
+            verifier._track_result(is_match=True)
+        
+        should_alert, reason = verifier.should_alert()
+        assert should_alert is True
+        assert verifier.get_stats()["recent_mismatches"] == 10
+        
+        verifier.reset_tracking()
+        assert verifier.get_stats()["recent_mismatches"] == 0
+    
     @pytest.mark.skipif(
         not pytest.importorskip("face_recognition", reason="face_recognition not installed"),
         reason="face_recognition not available"
@@ -127,6 +149,62 @@ class TestFaceVerifier:
             assert result.is_match is False
             assert "No face detected" in result.message
     
+    @pytest.mark.skipif(
+        not pytest.importorskip("face_recognition", reason="face_recognition not installed"),
+        reason="face_recognition not available"
+    )
+    def test_stationary_face_reuses_encoding(self):
+        """Test a face that has not moved is not re-encoded every call."""
+        from student_app.app.ai.face_verifier import FaceVerifier
+        import numpy as np
+        
+        verifier = FaceVerifier()
+        encoding = np.random.rand(128)
+        verifier._set_reference(encoding)
+        
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        box = (100, 300, 300, 100)
+        
+        with patch("face_recognition.face_locations", return_value=[box]), \
+             patch("face_recognition.face_encodings", return_value=[encoding]) as encode:
+            results = [verifier.verify(frame) for _ in range(verifier.REENCODE_EVERY + 1)]
+        
+        assert encode.call_count == 2
+        assert all(r.is_match for r in results)
+        
+        # Reused mismatches still count towards the alert thresholds
+        verifier.reset_tracking()
+        verifier._last_result = None
+        with patch("face_recognition.face_locations", return_value=[box]), \
+             patch("face_recognition.face_encodings", return_value=[encoding + 1.0]) as encode:
+            for call in range(1, verifier.REENCODE_EVERY + 2):
+                assert verifier.verify(frame).is_match is False
+                assert verifier.get_stats()["consecutive_mismatches"] == call
+        
+        assert encode.call_count == 2
+    
+    @pytest.mark.skipif(
+        not pytest.importorskip("face_recognition", reason="face_recognition not installed"),
+        reason="face_recognition not available"
+    )
+    def test_reference_encoding_cached(self, tmp_path):
+        """Test reloading the same reference photo reuses its encoding."""
+        from student_app.app.ai.face_verifier import FaceVerifier
+        import numpy as np
+        
+        photo = tmp_path / "reference.jpg"
+        photo.write_bytes(b"reference photo bytes")
+        encoding = np.random.rand(128)
+        
+        verifier = FaceVerifier()
+        with patch("face_recognition.load_image_file", return_value=np.zeros((4, 4, 3), dtype=np.uint8)), \
+             patch("face_recognition.face_encodings", return_value=[encoding]) as encode:
+            assert verifier.load_reference_from_file(photo) is True
+            assert verifier.load_reference_from_file(photo) is True
+        
+        assert encode.call_count == 1
+        assert verifier.is_ready is True
+    
     @pytest.mark.skipif(
         not pytest.importorskip("face_recognition", reason="face_recognition not installed"),
         reason="face_recognition not available"
@@ -84,6 +84,24 @@ class TestCircularBuffer:
         current = buffer.get_current_frame()
         assert current is not None
         assert np.array_equal(current.frame, frame)
+    
+    def test_jpeg_frame_storage(self):
+        """Test frames are stored compressed unless quality is 0."""
+        from student_app.app.buffer.circular_buffer import CircularBuffer
+        
+        frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        
+        buffer = CircularBuffer(retention_minutes=1, fps=15, jpeg_quality=90)
+        buffer.add_frame(frame)
+        current = buffer.get_current_frame()
+        assert current.encoded
+        assert current.frame.shape == frame.shape
+        
+        raw_buffer = CircularBuffer(retention_minutes=1, fps=15, jpeg_quality=0)
+        raw_buffer.add_frame(frame)
+        current = raw_buffer.get_current_frame()
+        assert not current.encoded
+        assert np.array_equal(current.frame, frame)
 
 
 class TestClipExtractor:
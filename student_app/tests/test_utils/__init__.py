@@ -0,0 +1 @@
+"""Utility tests package"""
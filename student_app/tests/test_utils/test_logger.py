@@ -0,0 +1,35 @@
+"""
+Unit tests for logging utilities.
+"""
+
+import json
+import logging
+import queue
+
+
+class TestRecordQueueHandler:
+    """Tests for the queue handler feeding the log listener."""
+    
+    def test_exception_survives_queue(self):
+        """Test JSON lines keep the exception field after queueing."""
+        from student_app.app.utils.logger import JSONFormatter, RecordQueueHandler
+        
+        log_queue = queue.SimpleQueue()
+        logger = logging.getLogger("test_logger.queue")
+        logger.propagate = False
+        handler = RecordQueueHandler(log_queue)
+        logger.addHandler(handler)
+        
+        try:
+            try:
+                raise ValueError("bad value")
+            except ValueError:
+                logger.exception("boom %s", 1)
+        finally:
+            logger.removeHandler(handler)
+        
+        record = log_queue.get_nowait()
+        line = json.loads(JSONFormatter().format(record))
+        
+        assert line["message"] == "boom 1"
+        assert "ValueError: bad value" in line["exception"]